@@ -1,19 +1,517 @@
+import atexit
+import bisect
+import contextlib
+import contextvars
+import functools
+import gzip
+import hashlib
+import inspect
+import itertools
+import json
 import logging
+import logging.handlers
+import mimetypes
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from urllib.parse import quote
 import nltk
+import numpy as np
 from nltk.stem import WordNetLemmatizer
 import spacy
 import sqlite3
-from flask import Flask, request, render_template_string
+from flask import Flask, Response, has_request_context, make_response, request, jsonify, stream_with_context
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags, quote_etag
+from database import QUERIES
+from sessions import SESSION_COOKIE, SESSION_SPILL_TTL, SessionStore, session_id_from_cookie
 
-# Configure logging
-logging.basicConfig(filename='chatbot.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging settings. '{pid}' in the file name is replaced by the process id, so that
+# several worker processes can each rotate their own file; the multi-process entry points
+# (launcher.py, asgi_app.py, chatbot.py with workers) use 'chatbot-{pid}.log' by default.
+LOG_FILE = os.environ.get('CHATBOT_LOG_FILE', 'chatbot.log')
+LOG_LEVEL = os.environ.get('CHATBOT_LOG_LEVEL', 'INFO')
+# 'text' keeps the classic one-line format; 'json' writes one compact JSON object per line
+LOG_FORMAT = os.environ.get('CHATBOT_LOG_FORMAT', 'text')
+LOG_MAX_BYTES = int(os.environ.get('CHATBOT_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('CHATBOT_LOG_BACKUPS', 5))
+# Share of questions whose per-question INFO lines are written (1.0 = all, 0.01 = one in a hundred)
+LOG_SAMPLE_RATE = float(os.environ.get('CHATBOT_LOG_SAMPLE_RATE', 1.0))
 
-# Initialize spaCy and load the English NLP model
-nlp = spacy.load("en_core_web_sm")
+# Context of the request being answered: id, whether its INFO lines are sampled in, matched intent and stage timings
+_request_context = contextvars.ContextVar('request_context', default=None)
 
-# Download NLTK models for tokenizing and lemmatizing text
-nltk.download('punkt')
-nltk.download('wordnet')
+# Formatter writing each record as one compact JSON object
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as JSON lines with the request id, intent and stage timings when known.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'msg': record.getMessage(),
+        }
+        for field in ('request_id', 'intent', 'stages'):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'))
+
+# Filter adding the current request id to every record
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        if getattr(record, 'request_id', None) is None:
+            context = _request_context.get()
+            record.request_id = context['id'] if context is not None else None
+        return True
+
+# Queue handler that leaves the formatting to the background writer
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues log records as they are. The standard QueueHandler formats each record in the
+    calling thread and drops its exception info, so the writer's formatter would never see
+    the traceback; the queue never leaves the process, so nothing has to be pickled.
+    """
+
+    def prepare(self, record):
+        return record
+
+# Background log writer, started by configure_logging()
+_log_listener = None
+_log_listener_pid = None
+
+# Function to route logging through a queue to a background writer thread
+def configure_logging():
+    """
+    Sends log records from the request threads to a queue. A background QueueListener
+    thread formats them and writes them to a size-rotated file, so no request waits on file I/O.
+    
+    Call it again after forking; the child gets its own queue and writer thread.
+    """
+    global _log_listener, _log_listener_pid
+    root = logging.getLogger()
+    # A forked child inherits the parent's listener object but not its thread
+    if _log_listener is not None and _log_listener_pid == os.getpid():
+        _log_listener.stop()
+    for handler in [h for h in root.handlers if isinstance(h, RecordQueueHandler)]:
+        root.removeHandler(handler)
+    
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE.format(pid=os.getpid()), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    if LOG_FORMAT == 'json':
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = RecordQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    _log_listener_pid = os.getpid()
+
+# Function to flush and stop the background log writer, also run automatically at interpreter exit
+def stop_logging():
+    """
+    Writes out any queued records and stops the background writer.
+    """
+    global _log_listener
+    if _log_listener is not None and _log_listener_pid == os.getpid():
+        _log_listener.stop()
+    _log_listener = None
+
+configure_logging()
+atexit.register(stop_logging)
+
+# Function to write a per-question INFO line, subject to sampling
+def log_question(message, *args):
+    """
+    Logs a per-question INFO line if INFO is enabled and the current question is sampled.
+    
+    The message is only formatted (lazily, %-style) when the line is actually written.
+    
+    Args:
+        message (str): Message with %-style placeholders.
+        *args: Values for the placeholders.
+    """
+    context = _request_context.get()
+    if context is not None and not context['sampled']:
+        return
+    if logging.root.isEnabledFor(logging.INFO):
+        logging.info(message, *args)
+
+# Context manager that gives a request its own context and writes a summary line at the end
+@contextlib.contextmanager
+def request_context(request_id=None):
+    """
+    Opens a new request context (unless one is already active) and, when it ends,
+    logs one summary line with the request id, intent and stage timings.
+    
+    Args:
+        request_id (str): Id given by a proxy in front of the app (X-Request-ID), if any.
+    
+    Yields:
+        dict: The active request context.
+    """
+    active = _request_context.get()
+    if active is not None:
+        yield active
+        return
+    context = {
+        'id': request_id or uuid.uuid4().hex[:12],
+        'sampled': LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE,
+        'intent': None,
+        'stages': {},
+    }
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+        if context['sampled'] and logging.root.isEnabledFor(logging.INFO):
+            stages = {stage: round(seconds * 1000, 3) for stage, seconds in context['stages'].items()}
+            logging.info("Request %s answered: intent=%s stages_ms=%s", context['id'], context['intent'], stages,
+                         extra={'request_id': context['id'], 'intent': context['intent'], 'stages': stages})
+
+# Decorator that runs each call in its own request context (see request_context)
+def with_request_context(func):
+    """
+    Runs the decorated function in a request context, keeping the Flask request's X-Request-ID if it has one.
+    
+    Args:
+        func (callable): The function answering a request.
+    
+    Returns:
+        callable: The wrapped function.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Keep the id given by a proxy in front of the app, so its logs and ours can be matched
+        request_id = request.headers.get('X-Request-ID') if has_request_context() else None
+        with request_context(request_id):
+            return func(*args, **kwargs)
+    return wrapper
+
+# Database settings: file location, memory-mapped I/O size and prepared-statement cache size per connection
+DB_PATH = os.environ.get('CHATBOT_DB_PATH', 'electronics_store.db')
+DB_MMAP_SIZE = int(os.environ.get('CHATBOT_DB_MMAP_SIZE', 256 * 1024 * 1024))
+DB_CACHED_STATEMENTS = int(os.environ.get('CHATBOT_DB_CACHED_STATEMENTS', 256))
+# 'file' reads the database file directly; 'memory' serves reads from an in-memory copy
+# that is refreshed when the file changes (see SnapshotConnectionManager)
+DB_MODE = os.environ.get('CHATBOT_DB_MODE', 'file')
+# Seconds between two checks for changes to the file in 'memory' mode
+DB_SNAPSHOT_REFRESH = float(os.environ.get('CHATBOT_DB_SNAPSHOT_REFRESH', 5.0))
+
+# Catalog cache settings: maximum entries, seconds an entry stays valid, and how often to check the database for changes
+CACHE_SIZE = int(os.environ.get('CHATBOT_CACHE_SIZE', 1024))
+CACHE_TTL = float(os.environ.get('CHATBOT_CACHE_TTL', 300))
+CACHE_CHECK_INTERVAL = float(os.environ.get('CHATBOT_CACHE_CHECK_INTERVAL', 1.0))
+
+# Listings: rows per page of the /api/products and /api/orders endpoints, and the most
+# products or orders put in a single chat answer
+PAGE_SIZE = int(os.environ.get('CHATBOT_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = 1000
+CHAT_LIST_LIMIT = int(os.environ.get('CHATBOT_CHAT_LIST_LIMIT', 20))
+
+# Largest spaCy batch size and number of spaCy processes a /api/answer/batch request may ask for
+BATCH_MAX_SIZE = int(os.environ.get('CHATBOT_BATCH_MAX_SIZE', 256))
+BATCH_MAX_PROCESSES = int(os.environ.get('CHATBOT_BATCH_MAX_PROCESSES', 1))
+# Most questions accepted in one /api/answer/batch request
+BATCH_MAX_QUESTIONS = int(os.environ.get('CHATBOT_BATCH_MAX_QUESTIONS', 1000))
+
+# Response cache settings: set CHATBOT_RESPONSE_CACHE=0 to always run the full pipeline
+RESPONSE_CACHE_ENABLED = os.environ.get('CHATBOT_RESPONSE_CACHE', '1') == '1'
+RESPONSE_CACHE_SIZE = int(os.environ.get('CHATBOT_RESPONSE_CACHE_SIZE', 4096))
+RESPONSE_CACHE_TTL = float(os.environ.get('CHATBOT_RESPONSE_CACHE_TTL', 600))
+
+# Order of the answering pipeline: 'tiered' tries the keyword intents first and only runs spaCy
+# when the question needs entity extraction; 'ner_first' always runs spaCy first, as before
+PIPELINE_MODE = os.environ.get('CHATBOT_PIPELINE', 'tiered')
+
+# How intents are recognized: 'rules' uses the keyword matcher only; 'classifier' scores the
+# question against example utterances and falls back to the keyword rules when unsure
+INTENT_MODE = os.environ.get('CHATBOT_INTENT_MODE', 'rules')
+# Lowest cosine similarity at which the classifier's answer is trusted over the rules
+CLASSIFIER_THRESHOLD = float(os.environ.get('CHATBOT_CLASSIFIER_THRESHOLD', 0.15))
+# Number of hashed features (lemmas and lemma pairs) in the classifier's vectors
+CLASSIFIER_FEATURES = int(os.environ.get('CHATBOT_CLASSIFIER_FEATURES', 4096))
+
+# Optional JSON file with extra intents that have fixed answers (see load_intents_file)
+INTENTS_FILE = os.environ.get('CHATBOT_INTENTS_FILE')
+
+# Startup settings, read from the environment so each worker can be tuned without code changes
+SPACY_MODEL = os.environ.get('CHATBOT_SPACY_MODEL', 'en_core_web_sm')
+# When set, never try to download NLTK data at startup; only check that it is present locally
+OFFLINE_STARTUP = os.environ.get('CHATBOT_OFFLINE', '0') == '1'
+# When set, run a dummy document through spaCy at startup so the first request is not slow
+PREWARM = os.environ.get('CHATBOT_PREWARM', '0') == '1'
+
+# NLTK resources used by process_text, as (download name, nltk.data path)
+NLTK_RESOURCES = [
+    ('punkt', 'tokenizers/punkt'),
+    ('punkt_tab', 'tokenizers/punkt_tab'),
+    ('wordnet', 'corpora/wordnet'),
+]
+
+# spaCy components that doc.ents does not depend on; they are never loaded
+NER_UNUSED_COMPONENTS = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter']
+
+# Seconds spent in each startup phase, filled in by initialize()
+STARTUP_TIMINGS = {}
+
+# spaCy pipeline and WordNet lemmatizer, created by initialize() and get_lemmatizer()
+nlp = None
+_lemmatizer = None
+
+# Set CHATBOT_METRICS=0 to remove all timing hooks; the decorated functions are then left untouched
+METRICS_ENABLED = os.environ.get('CHATBOT_METRICS', '1') == '1'
+
+# Upper bounds, in seconds, of the stage latency histogram buckets
+METRICS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Stage latency histograms and per-intent counters
+class Metrics:
+    """
+    Collects per-stage latency histograms and per-intent counters, and renders them
+    in the Prometheus text exposition format.
+    
+    Args:
+        buckets (tuple): Upper bounds of the histogram buckets, in seconds.
+    """
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._intents = {}
+
+    def observe(self, stage, seconds):
+        """
+        Records how long one run of a stage took.
+        
+        Args:
+            stage (str): Stage name.
+            seconds (float): Duration.
+        """
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram[1] += seconds
+
+    def count_intent(self, intent):
+        """
+        Counts one question answered by an intent.
+        
+        Args:
+            intent (str): Intent name, for example 'hours', 'entity_person' or 'generic'.
+        """
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._intents[intent] = self._intents.get(intent, 0) + 1
+
+    def render(self):
+        """
+        Renders the stage histograms and intent counters.
+        
+        Returns:
+            list: Lines in the Prometheus text exposition format.
+        """
+        with self._lock:
+            stages = {stage: (list(counts), total) for stage, (counts, total) in self._stages.items()}
+            intents = dict(self._intents)
+        lines = [
+            "# HELP chatbot_stage_seconds Time spent in each stage of answering a question.",
+            "# TYPE chatbot_stage_seconds histogram",
+        ]
+        for stage, (counts, total) in sorted(stages.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'chatbot_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'chatbot_stage_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'chatbot_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+        lines += [
+            "# HELP chatbot_intent_total Questions answered by each intent.",
+            "# TYPE chatbot_intent_total counter",
+        ]
+        for intent, count in sorted(intents.items()):
+            lines.append(f'chatbot_intent_total{{intent="{intent}"}} {count}')
+        return lines
+
+# Shared metrics registry
+metrics = Metrics()
+
+# Function to read the intent that answered the current question
+def current_intent():
+    """
+    Returns the intent recorded for the current request, if any.
+    
+    Returns:
+        str: The intent name, or None.
+    """
+    context = _request_context.get()
+    return context['intent'] if context is not None else None
+
+# Function to note which intent answered the current question
+def record_intent(intent):
+    """
+    Counts the intent in the metrics and attaches it to the current request's log summary.
+    
+    Args:
+        intent (str): Intent name, for example 'hours', 'entity_person' or 'generic'.
+    """
+    metrics.count_intent(intent)
+    context = _request_context.get()
+    if context is not None:
+        context['intent'] = intent
+
+# Function to record one run of a stage in the metrics and the current request's log summary
+def record_stage(stage, seconds):
+    """
+    Records the duration of one run of a stage, for stages timed outside timed_stage
+    (for example spaCy calls made in another process).
+    
+    Args:
+        stage (str): Stage name.
+        seconds (float): Duration.
+    """
+    if not METRICS_ENABLED:
+        return
+    metrics.observe(stage, seconds)
+    context = _request_context.get()
+    if context is not None:
+        context['stages'][stage] = context['stages'].get(stage, 0.0) + seconds
+
+# Decorator that times every call of a function as one run of a stage
+def timed_stage(stage):
+    """
+    Records the duration of each call of the decorated function in the stage histogram.
+    
+    With CHATBOT_METRICS=0 the function is returned unchanged, so there is no overhead at all.
+    
+    Args:
+        stage (str): Stage name.
+    
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_stage(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+# Function to make sure the NLTK data is available locally
+def check_nltk_resources(download=True):
+    """
+    Checks that the NLTK resources are installed, downloading only the missing ones.
+    
+    Args:
+        download (bool): Whether missing resources may be downloaded.
+    
+    Returns:
+        list: Names of the resources that are still missing.
+    """
+    missing = []
+    for name, path in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if download and nltk.download(name, quiet=True):
+                continue
+            missing.append(name)
+    if missing:
+        logging.warning("NLTK resources not installed: %s. Run: python -c \"import nltk; nltk.download('punkt'); nltk.download('wordnet')\"", missing)
+    return missing
+
+# Function to load spaCy with only the components needed for entity recognition
+def load_ner_pipeline(model_name=SPACY_MODEL):
+    """
+    Loads a spaCy model without the components that named entity recognition does not use.
+    
+    Args:
+        model_name (str): Name or path of the spaCy model.
+    
+    Returns:
+        Language: The spaCy pipeline.
+    """
+    pipeline = spacy.load(model_name, exclude=NER_UNUSED_COMPONENTS)
+    # Drop the shared tok2vec layer when no remaining component listens to it
+    if 'tok2vec' in pipeline.pipe_names and not pipeline.get_pipe('tok2vec').listening_components:
+        pipeline.remove_pipe('tok2vec')
+    return pipeline
+
+# Function to get the shared WordNet lemmatizer, creating it on first use
+def get_lemmatizer():
+    """
+    Returns the WordNet lemmatizer, creating it the first time it is needed.
+    
+    Returns:
+        WordNetLemmatizer: The shared lemmatizer.
+    """
+    global _lemmatizer
+    if _lemmatizer is None:
+        _lemmatizer = WordNetLemmatizer()
+    return _lemmatizer
+
+# Function to prepare the NLP resources and record how long each phase takes
+def initialize(offline=OFFLINE_STARTUP, prewarm=PREWARM):
+    """
+    Checks the NLTK data, loads spaCy and optionally prewarms it, timing each phase.
+    
+    Args:
+        offline (bool): If True, only check for NLTK data and never download it.
+        prewarm (bool): If True, run a dummy document through spaCy.
+    
+    Returns:
+        dict: Seconds spent in each phase.
+    """
+    global nlp
+    STARTUP_TIMINGS.clear()
+    start = time.perf_counter()
+    
+    phase_start = time.perf_counter()
+    check_nltk_resources(download=not offline)
+    STARTUP_TIMINGS['nltk_check'] = time.perf_counter() - phase_start
+    
+    phase_start = time.perf_counter()
+    nlp = load_ner_pipeline()
+    STARTUP_TIMINGS['spacy_load'] = time.perf_counter() - phase_start
+    
+    if prewarm:
+        phase_start = time.perf_counter()
+        nlp("Prewarm the pipeline for John Smith in New York.")
+        STARTUP_TIMINGS['prewarm'] = time.perf_counter() - phase_start
+    
+    STARTUP_TIMINGS['total'] = time.perf_counter() - start
+    logging.info("Startup timings: %s", ", ".join(f"{phase}={seconds:.3f}s" for phase, seconds in STARTUP_TIMINGS.items()))
+    return dict(STARTUP_TIMINGS)
+
+initialize()
 
 # Function to process text using NLTK (tokenization and lemmatization)
 def process_text(text):
@@ -21,125 +519,1455 @@ def process_text(text):
     Processes the given text by tokenizing and lemmatizing words to normalize them.
     
     Args:
-        text (str): The text to be processed.
+        text (str): The text to be processed.
+    
+    Returns:
+        list: List of processed words.
+    """
+    lemmatizer = get_lemmatizer()
+    tokens = nltk.word_tokenize(text)
+    # Apply lemmatization to reduce words to their base form
+    tokens = [lemmatizer.lemmatize(token.lower()) for token in tokens]
+    return tokens
+
+# Function to build the response cache key for a question
+@timed_stage('normalize')
+def normalize_question(question, intent):
+    """
+    Builds the response cache key of a question from everything its answer depends on.
+    
+    An intent's fixed response depends only on the intent, so every phrasing that matches
+    it shares one entry. Other answers depend on the question's own words (the name looked
+    up in the database, or the entities spaCy finds), so they are keyed on the lowercased
+    question, and inflected variants such as "laptop" and "laptops" keep their own answers.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+        intent (dict): The question's matched intent, or None.
+    
+    Returns:
+        tuple: The cache key.
+    """
+    # With ner_first, a detected entity takes precedence even over fixed responses
+    if (PIPELINE_MODE == 'tiered' and intent is not None and 'handler' not in intent
+            and not intent.get('needs_entities')):
+        return ('intent', intent['name'])
+    return ('text', question)
+
+# Function to process questions using spaCy for entity recognition
+@timed_stage('ner')
+def process_question_with_spacy(question):
+    """
+    Processes the given question using spaCy to identify entities.
+    
+    Args:
+        question (str): The user's question.
+    
+    Returns:
+        list: List of entities found in the question.
+    """
+    doc = nlp(question)
+    entities = []
+    for ent in doc.ents:
+        entities.append((ent.text, ent.label_))
+    return entities
+
+# Function to process many questions at once using spaCy's batched pipeline
+@timed_stage('ner_batch')
+def process_questions_with_spacy(questions, batch_size=64, n_process=1):
+    """
+    Processes a list of questions with spaCy's nlp.pipe to identify entities in batches.
+    
+    Args:
+        questions (list): The users' questions.
+        batch_size (int): Number of texts spaCy buffers per batch.
+        n_process (int): Number of worker processes used by spaCy.
+    
+    Returns:
+        list: One list of entities per question, in input order.
+    """
+    docs = nlp.pipe(questions, batch_size=batch_size, n_process=n_process)
+    return [[(ent.text, ent.label_) for ent in doc.ents] for doc in docs]
+
+# Holder for a thread's connection; when the thread exits, the holder is released and the connection goes back to the pool
+class _ConnectionHolder:
+    __slots__ = ('conn', 'generation', '__weakref__')
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+
+# Connection manager shared by the database query helpers
+class ConnectionManager:
+    """
+    Hands out reusable read-only SQLite connections, one per thread.
+    
+    Connections are opened once, read-only with memory-mapped I/O and a
+    prepared-statement cache, and are kept for the life of the thread. Nothing
+    is written to the file: switch it to WAL mode with python database.py --migrate
+    so that readers do not wait for writers. When a
+    thread exits its connection is returned to a small idle pool so the next
+    thread can reuse it instead of opening a new one.
+    
+    Args:
+        path (str): Path to the SQLite database file.
+        mmap_size (int): Bytes of the database to memory-map (PRAGMA mmap_size).
+        cached_statements (int): Number of prepared statements cached per connection.
+        max_idle (int): Maximum number of idle connections kept for reuse.
+    """
+
+    def __init__(self, path=DB_PATH, mmap_size=DB_MMAP_SIZE, cached_statements=DB_CACHED_STATEMENTS, max_idle=8):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle = []
+        self._open_connections = set()
+        self._generation = 0
+        self._tables = None
+
+    def _open(self):
+        uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def _release(self, conn, generation):
+        with self._lock:
+            if generation == self._generation and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._open_connections.discard(conn)
+        conn.close()
+
+    def get_connection(self):
+        """
+        Returns the calling thread's connection, opening or reusing one if needed.
+        
+        Returns:
+            sqlite3.Connection: A read-only connection to the database.
+        """
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None and holder.generation == self._generation:
+            return holder.conn
+        
+        with self._lock:
+            generation = self._generation
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+            with self._lock:
+                self._open_connections.add(conn)
+        
+        holder = _ConnectionHolder(conn, generation)
+        weakref.finalize(holder, self._release, conn, generation)
+        self._local.holder = holder
+        return conn
+
+    def has_table(self, name):
+        """
+        Checks whether a table exists in the database. The table list is read once and cached.
+        
+        Args:
+            name (str): Table name.
+        
+        Returns:
+            bool: True if the table exists.
+        """
+        tables = self._tables
+        if tables is None:
+            rows = self.get_connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+            tables = self._tables = {row[0] for row in rows}
+        return name in tables
+
+    def open_watch_connection(self):
+        """
+        Opens a connection used only to notice changes to the database (see data_version).
+        
+        Returns:
+            sqlite3.Connection: A read-only connection.
+        """
+        return self._open()
+
+    def data_version(self, watch_conn):
+        """
+        Returns a number that changes whenever the data served by this manager changes.
+        
+        Args:
+            watch_conn (sqlite3.Connection): Connection from open_watch_connection(), always the same one.
+        
+        Returns:
+            int: The current version.
+        """
+        return watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close_all(self):
+        """
+        Closes every connection handed out so far. Threads open new ones on their next query.
+        """
+        with self._lock:
+            self._generation += 1
+            connections = list(self._open_connections)
+            self._open_connections.clear()
+            self._idle.clear()
+            self._tables = None
+        for conn in connections:
+            conn.close()
+
+# Unique names for the in-memory snapshots of this process
+_snapshot_ids = itertools.count(1)
+
+# Connection manager that serves reads from an in-memory copy of the database
+class SnapshotConnectionManager(ConnectionManager):
+    """
+    Copies the database into a shared in-memory SQLite database with the backup API and
+    hands out read-only connections to that copy, so lookups never touch the disk or the file's locks.
+    
+    A background thread checks the file's PRAGMA data_version every refresh_interval
+    seconds. When it has changed, a new copy is made while requests keep reading the
+    old one, and then the new copy is swapped in: each thread moves to it on its next
+    query, and the old copy is freed once no connection uses it.
+    
+    The copy is made the first time a connection is needed, in every process that uses
+    the manager, so forked workers each make their own.
+    
+    Args:
+        path (str): Path to the SQLite database file.
+        refresh_interval (float): Seconds between two checks for changes to the file.
+        cached_statements (int): Number of prepared statements cached per connection.
+        max_idle (int): Maximum number of idle connections kept for reuse.
+    """
+
+    def __init__(self, path=DB_PATH, refresh_interval=DB_SNAPSHOT_REFRESH, cached_statements=DB_CACHED_STATEMENTS, max_idle=8):
+        super().__init__(path, cached_statements=cached_statements, max_idle=max_idle)
+        self.refresh_interval = refresh_interval
+        self._snapshot_uri = None
+        # Connection that keeps the in-memory database alive while it is current
+        self._keeper = None
+        # Read-only connection to the file, used only to watch its data_version
+        self._source = None
+        self._source_version = None
+        self._owner_pid = None
+        self._refresher = None
+        self._stop = None
+        self.snapshot_version = 0
+        self.last_refresh = None
+
+    def _copy(self):
+        # Copy the file into a new named in-memory database; the backup reads one consistent version of the file
+        uri = f"file:chatbot_snapshot_{os.getpid()}_{next(_snapshot_ids)}?mode=memory&cache=shared"
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(Path(self.path).resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            source.backup(keeper)
+        finally:
+            source.close()
+        return uri, keeper
+
+    def _start(self):
+        # Called with the lock held. State inherited through fork belongs to the parent and is dropped, not closed.
+        self._idle = []
+        self._open_connections = set()
+        self._source = sqlite3.connect(Path(self.path).resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+        # Read the version before copying, so a change made during the copy triggers a refresh
+        self._source_version = self.data_version(self._source)
+        self._snapshot_uri, self._keeper = self._copy()
+        self._owner_pid = os.getpid()
+        self._generation += 1
+        self._tables = None
+        self.snapshot_version += 1
+        self.last_refresh = time.time()
+        self._stop = threading.Event()
+        self._refresher = threading.Thread(target=self._refresh_loop, args=(self._stop,), name='chatbot-snapshot', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self, stop):
+        while not stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except sqlite3.Error as e:
+                logging.error("Could not refresh the database snapshot: %s", e)
+
+    def _open(self):
+        conn = sqlite3.connect(self._snapshot_uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute("PRAGMA query_only=1")
+        # The snapshot is never written, so readers can skip the shared-cache table locks
+        conn.execute("PRAGMA read_uncommitted=1")
+        return conn
+
+    def get_connection(self):
+        """
+        Returns the calling thread's connection to the current snapshot, making the snapshot first if needed.
+        
+        Returns:
+            sqlite3.Connection: A read-only connection to the in-memory copy.
+        """
+        if self._owner_pid != os.getpid():
+            with self._lock:
+                if self._owner_pid != os.getpid():
+                    self._start()
+        return super().get_connection()
+
+    def refresh(self, force=False):
+        """
+        Makes a new snapshot if the file has changed since the current one was copied.
+        
+        Args:
+            force (bool): Copy the file even if it has not changed.
+        
+        Returns:
+            bool: True if a new snapshot was swapped in.
+        """
+        with self._lock:
+            source = self._source
+            if source is None or self._owner_pid != os.getpid():
+                return False
+            version = self.data_version(source)
+            if not force and version == self._source_version:
+                return False
+        
+        # Copy outside the lock; requests keep reading the current snapshot meanwhile
+        uri, keeper = self._copy()
+        with self._lock:
+            if self._source is not source:
+                # Closed while copying
+                keeper.close()
+                return False
+            old_keeper = self._keeper
+            self._snapshot_uri, self._keeper = uri, keeper
+            self._source_version = version
+            self._generation += 1
+            idle = self._idle
+            self._idle = []
+            self._open_connections.difference_update(idle)
+            self._tables = None
+            self.snapshot_version += 1
+            self.last_refresh = time.time()
+        # Connections still in use are closed by their threads when they move to the new snapshot
+        for conn in idle:
+            conn.close()
+        old_keeper.close()
+        logging.info("Swapped in database snapshot %d", self.snapshot_version)
+        return True
+
+    def open_watch_connection(self):
+        """
+        Caches follow the snapshot version instead of a connection; see data_version.
+        
+        Returns:
+            None
+        """
+        return None
+
+    def data_version(self, watch_conn):
+        """
+        Returns the snapshot version when called for a cache, or the file's data_version for the source connection.
+        
+        Args:
+            watch_conn (sqlite3.Connection): None for caches; the source connection for the refresher.
+        
+        Returns:
+            int: The version.
+        """
+        if watch_conn is None:
+            return self.snapshot_version
+        return super().data_version(watch_conn)
+
+    def stats(self):
+        """
+        Returns the snapshot counters.
+        
+        Returns:
+            dict: Snapshot version and when the current snapshot was made.
+        """
+        return {'mode': 'memory', 'snapshot_version': self.snapshot_version, 'last_refresh': self.last_refresh}
+
+    def close_all(self):
+        """
+        Stops the refresher, closes every connection and frees the snapshot. The next query makes a new one.
+        """
+        with self._lock:
+            stop, refresher = self._stop, self._refresher
+            self._stop = self._refresher = None
+        if stop is not None:
+            stop.set()
+            if refresher is not threading.current_thread():
+                refresher.join()
+        super().close_all()
+        with self._lock:
+            owned = self._owner_pid == os.getpid()
+            keeper, source = self._keeper, self._source
+            self._keeper = self._source = self._snapshot_uri = None
+            self._owner_pid = None
+        if owned:
+            for conn in (keeper, source):
+                if conn is not None:
+                    conn.close()
+
+# Shared connection manager used by the query helpers below
+db = SnapshotConnectionManager() if DB_MODE == 'memory' else ConnectionManager()
+
+# Function to close all pooled database connections, also run automatically at interpreter exit
+def close_db_connections():
+    """
+    Closes the pooled database connections and spills the chat sessions. Call this on shutdown.
+    """
+    catalog_cache.close()
+    response_cache.close()
+    db.close_all()
+    session_store.close()
+
+atexit.register(close_db_connections)
+
+# Read-through cache for database lookups
+class QueryCache:
+    """
+    LRU cache with a time-to-live for the results of database lookups.
+    
+    The whole cache is dropped when the database changes. Changes are detected
+    with PRAGMA data_version on a dedicated connection, checked at most once
+    every check_interval seconds, so a lookup normally costs one dictionary access.
+    
+    Args:
+        manager (ConnectionManager): Used to open the connection that watches for changes.
+        maxsize (int): Maximum number of cached entries; the least recently used is evicted first.
+        ttl (float): Seconds an entry stays valid.
+        check_interval (float): Minimum seconds between two data_version checks.
+    """
+
+    def __init__(self, manager, maxsize=CACHE_SIZE, ttl=CACHE_TTL, check_interval=CACHE_CHECK_INTERVAL):
+        self.manager = manager
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._watch_conn = None
+        self._data_version = None
+        self._next_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_for_changes(self, now):
+        # data_version only changes when another connection commits, so it must always be read on the same connection
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        if self._watch_conn is None:
+            self._watch_conn = self.manager.open_watch_connection()
+        version = self.manager.data_version(self._watch_conn)
+        if self._data_version is not None and version != self._data_version and self._entries:
+            self._entries.clear()
+            self.invalidations += 1
+        self._data_version = version
+
+    def get(self, key):
+        """
+        Returns the cached value for key.
+        
+        Args:
+            key (hashable): Cache key.
+        
+        Returns:
+            The cached value, or None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._check_for_changes(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+        
+        Args:
+            key (hashable): Cache key.
+            value: Value to store.
+            version (int): Value of self.invalidations read before the value was computed.
+                If the cache has been invalidated since, the value may be stale and is not stored.
+        """
+        with self._lock:
+            if version is not None and version != self.invalidations:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value for key, calling loader() to fill it on a miss.
+        
+        Args:
+            key (hashable): Cache key.
+            loader (callable): Function that computes the value.
+        
+        Returns:
+            The cached or freshly loaded value.
+        """
+        version = self.invalidations
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value, version)
+        return value
+
+    def clear(self):
+        """
+        Drops every cached entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        
+        Returns:
+            dict: hits, misses, evictions, invalidations and current size.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+            }
+
+    def close(self):
+        """
+        Drops every cached entry and closes the change-watching connection.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+                self._watch_conn = None
+            self._data_version = None
+            self._next_check = 0.0
+
+# Shared cache for catalog and employee lookups
+catalog_cache = QueryCache(db)
+
+# Cache of final answers keyed by normalize_question; cleared with the database like catalog_cache
+response_cache = QueryCache(db, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+# Decorator that serves a lookup helper through the catalog cache
+def cached_lookup(func):
+    """
+    Wraps a database lookup so repeated calls with the same arguments are served from catalog_cache.
+    
+    Arguments are bound to the function's signature with defaults filled in, so f(3),
+    f(limit=3) and, when 3 is the default, f() share one entry. The original function
+    stays available as the wrapper's 'uncached' attribute.
+    
+    Args:
+        func (callable): The lookup function.
+    
+    Returns:
+        callable: The cached lookup function.
+    """
+    signature = inspect.signature(func)
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__,) + tuple(bound.arguments.items())
+        return catalog_cache.get_or_load(key, lambda: func(*bound.args, **bound.kwargs))
+    wrapper.uncached = func
+    return wrapper
+
+# Function to decide whether a name lookup can go through a full-text search table
+def _use_search_index(fts_table, term):
+    """
+    Checks whether a lookup for the given term can use an FTS5 trigram table.
+    
+    Trigram indexes need at least three characters, and databases created before
+    the search tables were added fall back to LIKE until they are migrated
+    (python database.py --migrate).
+    
+    Args:
+        fts_table (str): Name of the FTS5 table.
+        term (str): The text being looked up.
+    
+    Returns:
+        bool: True if the FTS5 table should be used.
+    """
+    return len(term.strip()) >= 3 and db.has_table(fts_table)
+
+# Function to turn user text into an FTS5 phrase query, so quotes and operators are matched literally
+def _search_phrase(term):
+    """
+    Quotes a search term as an FTS5 phrase.
+    
+    Args:
+        term (str): The text being looked up.
+    
+    Returns:
+        str: The FTS5 query string.
+    """
+    return '"' + term.strip().replace('"', '""') + '"'
+
+# Function to query product details from the database
+@cached_lookup
+@timed_stage('db')
+def get_product_details(product_name):
+    """
+    Queries product details from the database based on the product name.
+    
+    Args:
+        product_name (str): The name of the product.
+    
+    Returns:
+        str: Product details or a message if the product is not found.
+    """
+    cursor = db.get_connection().cursor()
+    
+    if _use_search_index('products_fts', product_name):
+        # Rank by relevance, with matches in the name weighted above matches in the description
+        cursor.execute(QUERIES['product_search'], (_search_phrase(product_name),))
+    else:
+        cursor.execute(QUERIES['product_like'], ('%' + product_name + '%',))
+    product_info = cursor.fetchone()
+    
+    if product_info:
+        return f"Product Name: {product_info[0]}, Description: {product_info[1]}, Price: ${product_info[2]:.2f}, Stock Available: {product_info[3]}"
+    else:
+        return "Sorry, I couldn't find that product. Could you check the name or try another one?"
+
+# Function to read one page of products
+@timed_stage('db')
+def get_products_page(after=0, limit=PAGE_SIZE):
+    """
+    Reads the products that come after a given id, in id order (keyset pagination).
+    
+    Args:
+        after (int): Id of the last product already seen; 0 for the first page.
+        limit (int): Maximum number of products to return.
+    
+    Returns:
+        tuple: (list of (id, name) rows, id to pass as 'after' for the next page or None if this was the last page).
+    
+    Raises:
+        ValueError: If limit is less than 1.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    cursor = db.get_connection().cursor()
+    # One extra row tells whether another page follows
+    rows = cursor.execute(QUERIES['product_page'], (after, limit + 1)).fetchall()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1][0]
+    return rows, None
+
+# Function to iterate over all products a page at a time
+def iter_products(after=0, page_size=PAGE_SIZE):
+    """
+    Yields the products after a given id, reading them one page at a time so memory stays flat.
+    
+    Args:
+        after (int): Id of the last product already seen; 0 to start at the beginning.
+        page_size (int): Products read per query.
+    
+    Yields:
+        tuple: (id, name) for each product, in id order.
+    """
+    while after is not None:
+        rows, after = get_products_page(after, page_size)
+        yield from rows
+
+# Function to list the available products
+@cached_lookup
+def list_all_products(limit=CHAT_LIST_LIMIT):
+    """
+    Lists available products from the database, up to a limit.
+    
+    Args:
+        limit (int): Maximum number of product names to include.
+    
+    Returns:
+        str: Comma-separated product names, ending with "and more" when there are more products.
+    """
+    rows, next_after = get_products_page(0, limit)
+    names = ", ".join([row[1] for row in rows])
+    return f"{names} and more (see /api/products)" if next_after is not None else names
+
+# Function to get employee details from the database
+@cached_lookup
+@timed_stage('db')
+def get_employee_details(employee_name):
+    """
+    Queries employee details from the database based on the employee name.
+    
+    Args:
+        employee_name (str): The name of the employee.
+    
+    Returns:
+        str: Employee details or a message if the employee is not found.
+    """
+    cursor = db.get_connection().cursor()
+    
+    if _use_search_index('employees_fts', employee_name):
+        # Rank by relevance, with matches in the name weighted above matches in the position
+        cursor.execute(QUERIES['employee_search'], (_search_phrase(employee_name),))
+    else:
+        cursor.execute(QUERIES['employee_like'], ('%' + employee_name + '%',))
+    employee_info = cursor.fetchone()
+    
+    if employee_info:
+        return f"Employee Name: {employee_info[0]}, Position: {employee_info[1]}, Email: {employee_info[2]}"
+    else:
+        return "Employee not found."
+
+# Function to read one page of a customer's orders
+@timed_stage('db')
+def get_orders_page(customer_name, after=0, limit=PAGE_SIZE):
+    """
+    Reads the orders of the customers matching a name that come after a given order id, in id order.
+    
+    Args:
+        customer_name (str): The name of the customer.
+        after (int): Id of the last order already seen; 0 for the first page.
+        limit (int): Maximum number of orders to return.
+    
+    Returns:
+        tuple: (list of (customer name, order id, order date, total) rows, id to pass as 'after' for the next page or None).
+    
+    Raises:
+        ValueError: If limit is less than 1.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    cursor = db.get_connection().cursor()
+    if _use_search_index('customers_fts', customer_name):
+        cursor.execute(QUERIES['orders_page_search'], (_search_phrase(customer_name), after, limit + 1))
+    else:
+        cursor.execute(QUERIES['orders_page_like'], ('%' + customer_name + '%', after, limit + 1))
+    rows = cursor.fetchall()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1][1]
+    return rows, None
+
+# Function to iterate over all of a customer's orders a page at a time
+def iter_orders(customer_name, after=0, page_size=PAGE_SIZE):
+    """
+    Yields the orders of the customers matching a name after a given order id, one page per query.
+    
+    Args:
+        customer_name (str): The name of the customer.
+        after (int): Id of the last order already seen; 0 to start at the beginning.
+        page_size (int): Orders read per query.
+    
+    Yields:
+        tuple: (customer name, order id, order date, total) for each order, in id order.
+    """
+    while after is not None:
+        rows, after = get_orders_page(customer_name, after, page_size)
+        yield from rows
+
+# Function to get order details from the database
+def get_order_details(customer_name, limit=CHAT_LIST_LIMIT):
+    """
+    Queries order details from the database based on the customer name.
+    
+    Args:
+        customer_name (str): The name of the customer.
+        limit (int): Maximum number of orders to include.
+    
+    Returns:
+        str: Order details or a message if the order is not found.
+    """
+    order_info, next_after = get_orders_page(customer_name, 0, limit)
+    
+    if order_info:
+        lines = [f"Customer Name: {order[0]}, Order ID: {order[1]}, Order Date: {order[2]}, Total: ${order[3]:.2f}\n"
+                 for order in order_info]
+        if next_after is not None:
+            lines.append(f"More orders: /api/orders?customer={quote(customer_name)}\n")
+        return "".join(lines)
+    else:
+        return "Order not found for that customer."
+
+# Reply for databases created before the summary tables existed
+SUMMARIES_MISSING = "Those figures aren't available yet. Run python database.py --migrate to add the summary tables."
+
+# Function to get how much a customer has spent, from the customer_order_totals summary
+@cached_lookup
+@timed_stage('db')
+def get_customer_spending(customer_name):
+    """
+    Reads a customer's order count and total spent from the trigger-maintained summary table.
+    
+    Args:
+        customer_name (str): The name of the customer.
+    
+    Returns:
+        str: The customer's spending or a message if the customer is not found.
+    """
+    if not db.has_table('customer_order_totals'):
+        return SUMMARIES_MISSING
+    cursor = db.get_connection().cursor()
+    if _use_search_index('customers_fts', customer_name):
+        cursor.execute(QUERIES['customer_spending_search'], (_search_phrase(customer_name),))
+    else:
+        cursor.execute(QUERIES['customer_spending_like'], ('%' + customer_name + '%',))
+    row = cursor.fetchone()
+    
+    if row:
+        return f"Customer Name: {row[0]}, Orders: {row[1] or 0}, Total Spent: ${row[2] or 0:.2f}"
+    else:
+        return "Customer not found."
+
+# Function to list the best-selling products, from the product_sales summary
+@cached_lookup
+@timed_stage('db')
+def get_best_sellers(limit=5):
+    """
+    Lists the products with the most units sold, read from the top of the product_sales index.
+    
+    Args:
+        limit (int): Number of products to include.
+    
+    Returns:
+        str: The best sellers with their units sold.
+    """
+    if not db.has_table('product_sales'):
+        return SUMMARIES_MISSING
+    rows = db.get_connection().execute(QUERIES['best_sellers'], (limit,)).fetchall()
+    if not rows:
+        return "We haven't sold anything yet."
+    return "Best sellers: " + ", ".join(f"{name} ({units} sold)" for name, units in rows)
+
+# Function to get a product's average rating, from the product_rating_totals summary
+@cached_lookup
+@timed_stage('db')
+def get_product_rating(product_name):
+    """
+    Reads a product's rating count and sum from the trigger-maintained summary table.
+    
+    Args:
+        product_name (str): The name of the product.
+    
+    Returns:
+        str: The product's average rating or a message if the product is not found.
+    """
+    if not db.has_table('product_rating_totals'):
+        return SUMMARIES_MISSING
+    cursor = db.get_connection().cursor()
+    if _use_search_index('products_fts', product_name):
+        cursor.execute(QUERIES['product_rating_search'], (_search_phrase(product_name),))
+    else:
+        cursor.execute(QUERIES['product_rating_like'], ('%' + product_name + '%',))
+    row = cursor.fetchone()
+    
+    if not row:
+        return "Sorry, I couldn't find that product. Could you check the name or try another one?"
+    if not row[1]:
+        return f"Product Name: {row[0]} has no ratings yet."
+    return f"Product Name: {row[0]}, Average Rating: {row[2] / row[1]:.1f}/5 from {row[1]} rating{'s' if row[1] != 1 else ''}"
+
+# Function to drop filler words from a question, leaving the name it asks about
+def _strip_words(question, words):
+    """
+    Removes the given words, and punctuation around every word, from a question.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+        words (set): Words to remove.
+    
+    Returns:
+        str: The remaining words.
+    """
+    remaining = [word.strip("?!.,'") for word in question.split()]
+    return ' '.join([word for word in remaining if word and word not in words])
+
+# Functions answering the intents that need more than a fixed response
+def answer_product_details(question):
+    """
+    Answers a price or product question.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+    
+    Returns:
+        str: Product details.
+    """
+    # Extract product name from the question (last word as a basic example)
+    product_name = question.split()[-1]
+    return get_product_details(product_name)
+
+def answer_products_available(question):
+    """
+    Answers a question about which products are available.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+    
+    Returns:
+        str: The list of products.
+    """
+    return f"We have the following products available: {list_all_products()}"
+
+def answer_employee_details(question):
+    """
+    Answers a question about an employee.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+    
+    Returns:
+        str: Employee details.
+    """
+    # Extract employee name from the question (last word as a basic example)
+    employee_name = question.split()[-1]
+    return get_employee_details(employee_name)
+
+def answer_order_details(question):
+    """
+    Answers a question about a customer's orders.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+    
+    Returns:
+        str: Order details.
+    """
+    words = question.split()
+    customer_name = ' '.join([word for word in words if word not in ["order", "orders", "does", "have"]])
+    return get_order_details(customer_name)
+
+def answer_customer_spending(question):
+    """
+    Answers a question about how much a customer has spent.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+    
+    Returns:
+        str: The customer's order count and total spent.
+    """
+    customer_name = _strip_words(question, {"how", "much", "has", "have", "did", "does", "do", "is", "what", "the", "total",
+                                            "spent", "spend", "spending", "in", "so", "far", "by", "of", "on", "orders"})
+    return get_customer_spending(customer_name)
+
+def answer_best_sellers(question):
+    """
+    Answers a question about the best-selling products, with an optional count ("top 3 best sellers").
+    
+    Args:
+        question (str): The user's question, already lowercased.
     
     Returns:
-        list: List of processed words.
+        str: The best sellers.
     """
-    lemmatizer = WordNetLemmatizer()
-    tokens = nltk.word_tokenize(text)
-    # Apply lemmatization to reduce words to their base form
-    tokens = [lemmatizer.lemmatize(token.lower()) for token in tokens]
-    return tokens
+    numbers = [int(word) for word in question.split() if word.isdigit()]
+    limit = min(numbers[0], CHAT_LIST_LIMIT) if numbers and numbers[0] > 0 else 5
+    return get_best_sellers(limit)
 
-# Function to process questions using spaCy for entity recognition
-def process_question_with_spacy(question):
+def answer_product_rating(question):
     """
-    Processes the given question using spaCy to identify entities.
+    Answers a question about a product's average rating.
     
     Args:
-        question (str): The user's question.
+        question (str): The user's question, already lowercased.
     
     Returns:
-        list: List of entities found in the question.
+        str: The product's average rating.
     """
-    doc = nlp(question)
-    entities = []
-    for ent in doc.ents:
-        entities.append((ent.text, ent.label_))
-    return entities
+    product_name = _strip_words(question, {"what", "whats", "is", "are", "the", "average", "rating", "ratings", "rated",
+                                           "how", "well", "of", "for", "a", "an", "product", "reviews", "customer"})
+    return get_product_rating(product_name)
 
-# Function to query product details from the database
-def get_product_details(product_name):
+# Keyword intents. A question matches an intent when it contains any of its keywords;
+# when several intents match, the lowest priority number wins. Each intent has either a
+# fixed 'response' or a 'handler' that is called with the lowercased question, and may list
+# 'examples' of how people phrase it for the intent classifier. Intents
+# marked 'needs_entities' look up a person, product or customer, so spaCy still runs
+# before them in the tiered pipeline and a detected entity takes precedence. Intents
+# marked 'overrides_entities' read the name from the text themselves, so they take
+# precedence over the entity rules in both pipeline modes.
+INTENTS = [
+    {'name': 'hours', 'priority': 10, 'keywords': ['hours', 'opening hours'],
+     'response': "Our business hours are Monday to Friday, 9am to 5pm. We're closed on weekends and holidays.",
+     'examples': ["when are you open", "what time do you open", "what time do you close", "are you open on weekends",
+                  "when does the store open", "what are your opening times", "are you open today"]},
+    {'name': 'location', 'priority': 20, 'keywords': ['location', 'address'],
+     'response': "We are located at 123 Business Street, Cityville. You can find us easily using GPS or public transportation.",
+     'examples': ["where are you", "where is the store", "how do i get to your shop", "where can i find you",
+                  "directions to the store", "where are you based", "which street are you on"]},
+    # The aggregate intents rank above product_details and order_details, whose keywords
+    # ("product", "orders") often appear in the same question. They read the name from the
+    # text and override the entity rules, since a PERSON entity would be looked up as an employee.
+    {'name': 'best_sellers', 'priority': 22, 'keywords': ['best seller', 'bestseller', 'best-selling', 'best selling', 'top selling'],
+     'handler': answer_best_sellers, 'overrides_entities': True,
+     'examples': ["what sells the most", "most popular items", "which products sell best", "your most sold products",
+                  "what are people buying the most"]},
+    {'name': 'customer_spending', 'priority': 24, 'keywords': ['spent', 'spend'],
+     'handler': answer_customer_spending, 'overrides_entities': True,
+     'examples': ["how much has john paid in total", "total purchases by alice", "how much money has bob given you",
+                  "what is the lifetime value of the customer"]},
+    # Leading spaces: 'rating' and 'rated' also occur inside "operating", "generated", ...
+    {'name': 'product_rating', 'priority': 26, 'keywords': [' rating', ' rated'],
+     'handler': answer_product_rating, 'overrides_entities': True,
+     'examples': ["how good is the laptop", "what do customers think of the phone", "how many stars does the tablet have",
+                  "are the headphones any good", "how do people review the monitor"]},
+    {'name': 'product_details', 'priority': 30, 'keywords': ['price', 'cost', 'product'],
+     'handler': answer_product_details, 'needs_entities': True,
+     'examples': ["how much is the laptop", "how much does the phone cost", "what is the price of the tablet",
+                  "how expensive is the monitor", "tell me about the headphones", "how much for the camera"]},
+    {'name': 'products_available', 'priority': 40, 'keywords': ['products available', 'what products do you have available'],
+     'handler': answer_products_available,
+     'examples': ["what do you sell", "which items do you have", "show me your catalog", "list everything you sell",
+                  "what items are in stock", "what can i buy"]},
+    {'name': 'employee_details', 'priority': 50, 'keywords': ['employee', 'employees'],
+     'handler': answer_employee_details, 'needs_entities': True,
+     'examples': ["who works there", "who is your sales manager", "tell me about a staff member",
+                  "which team member handles sales", "staff details", "who is on your team"]},
+    {'name': 'order_details', 'priority': 60, 'keywords': ['order', 'orders'],
+     'handler': answer_order_details, 'needs_entities': True,
+     'examples': ["what did john buy", "show purchases for alice", "has bob bought anything", "status of my purchase",
+                  "what has the customer purchased", "when was my purchase shipped"]},
+    {'name': 'services', 'priority': 70, 'keywords': ['services'],
+     'response': "We offer consulting, development, and support services. Let us know how we can assist you!",
+     'examples': ["what do you offer", "do you provide consulting", "can you help with development",
+                  "do you offer technical support", "what kind of help do you provide"]},
+    {'name': 'contact', 'priority': 80, 'keywords': ['contact', 'phone', 'email'],
+     'response': "You can reach us by phone at 555-1234 or via email at info@example.com. We're happy to help!",
+     'examples': ["how can i reach you", "how do i get in touch", "can i call you", "what is your telephone number",
+                  "how do i reach customer support", "can i write to you"]},
+    {'name': 'careers', 'priority': 90, 'keywords': ['career', 'job'],
+     'response': "We're always looking for talented individuals to join our team. Check our careers page for current openings.",
+     'examples': ["are you hiring", "do you have any openings", "how can i work for you", "any vacancies",
+                  "i want to join your team", "can i apply to work at your company"]},
+    {'name': 'faq', 'priority': 100, 'keywords': ['faq'],
+     'response': "Please visit our FAQs page for answers to frequently asked questions. If you can't find what you're looking for, feel free to ask us directly.",
+     'examples': ["frequently asked questions", "where are the common questions", "is there a help page",
+                  "common questions and answers"]},
+]
+
+# Function to read extra fixed-answer intents from a JSON file
+def load_intents_file(path):
     """
-    Queries product details from the database based on the product name.
+    Loads extra intents from a JSON file, so new fixed answers can be added without code changes.
+    
+    The file holds a list of objects with 'name', 'priority', 'keywords' and 'response',
+    and optionally 'examples' for the intent classifier.
     
     Args:
-        product_name (str): The name of the product.
+        path (str): Path to the JSON file.
     
     Returns:
-        str: Product details or a message if the product is not found.
+        list: The intents.
+    """
+    with open(path, encoding='utf-8') as f:
+        intents = json.load(f)
+    for intent in intents:
+        missing = {'name', 'priority', 'keywords', 'response'} - set(intent)
+        if missing:
+            raise ValueError(f"Intent {intent.get('name', '?')} in {path} is missing {sorted(missing)}")
+        intent['keywords'] = [keyword.lower() for keyword in intent['keywords']]
+    return intents
+
+# Keyword matcher compiled from the intent table
+class IntentMatcher:
     """
-    conn = sqlite3.connect('electronics_store.db')
-    cursor = conn.cursor()
+    Finds the highest-priority intent whose keywords occur in a text, in a single pass.
     
-    cursor.execute("SELECT name, description, price, stock_quantity FROM products WHERE name LIKE ?", ('%' + product_name + '%',))
-    product_info = cursor.fetchone()
+    All keywords are compiled into one Aho-Corasick automaton, so matching reads each
+    character of the question once however many intents and keywords there are. Matches
+    are plain substring matches, the same as the "keyword in question" tests they replace.
+    A keyword that starts with a space only matches at the start of a word (' rating'
+    matches "rating for the laptop" but not "operating"), since the question is read as
+    if it began with a space.
+    
+    Args:
+        intents (list): Intent dictionaries with 'priority' and 'keywords'.
+    """
+
+    def __init__(self, intents):
+        # Stable sort: intents with the same priority keep their declaration order
+        self.intents = sorted(intents, key=lambda intent: intent['priority'])
+        goto = [{}]
+        best = [None]
+        for index, intent in enumerate(self.intents):
+            for keyword in intent['keywords']:
+                state = 0
+                for char in keyword:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][char] = next_state
+                        goto.append({})
+                        best.append(None)
+                    state = next_state
+                if best[state] is None or index < best[state]:
+                    best[state] = index
+        
+        # Breadth-first pass to add failure links; each state also inherits the
+        # best intent of its failure state, since that keyword ends there too
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0) if state else 0
+                inherited = best[fail[next_state]]
+                if inherited is not None and (best[next_state] is None or inherited < best[next_state]):
+                    best[next_state] = inherited
+        
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+
+    @timed_stage('keyword')
+    def match(self, text):
+        """
+        Returns the highest-priority intent with a keyword in text.
+        
+        Args:
+            text (str): The lowercased question.
+        
+        Returns:
+            dict: The matched intent, or None.
+        """
+        goto, fail, best = self._goto, self._fail, self._best
+        # Start in the state after a space, so keywords with a leading space match the first word too
+        state = goto[0].get(' ', 0)
+        found = best[state]
+        if found == 0:
+            return self.intents[0]
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            index = best[state]
+            if index is not None and (found is None or index < found):
+                found = index
+                if found == 0:
+                    break
+        return None if found is None else self.intents[found]
+
+# Compile the intent table once at startup
+ALL_INTENTS = INTENTS + (load_intents_file(INTENTS_FILE) if INTENTS_FILE else [])
+intent_matcher = IntentMatcher(ALL_INTENTS)
+
+# Vector classifier trained on each intent's examples and keywords
+class IntentClassifier:
+    """
+    Scores questions against every intent at once with a single matrix multiply.
     
-    conn.close()
+    Each text is turned into a hashed bag of lemmas (from process_text) and lemma pairs,
+    weighted by TF-IDF and normalized to unit length. Each intent is represented by the
+    normalized mean (centroid) of its examples' vectors, so the dot product of a question
+    with the centroid matrix gives the cosine similarity to every intent.
     
-    if product_info:
-        return f"Product Name: {product_info[0]}, Description: {product_info[1]}, Price: ${product_info[2]:.2f}, Stock Available: {product_info[3]}"
-    else:
-        return "Sorry, I couldn't find that product. Could you check the name or try another one?"
+    Args:
+        intents (list): Intent dictionaries with 'keywords' and optional 'examples'.
+        features (int): Number of hashed feature columns.
+        threshold (float): Lowest similarity accepted; below it the keyword rules decide.
+    """
+
+    def __init__(self, intents, features=CLASSIFIER_FEATURES, threshold=CLASSIFIER_THRESHOLD):
+        self.features = features
+        self.threshold = threshold
+        self.intents = [intent for intent in intents if intent.get('examples') or intent['keywords']]
+        texts, labels = [], []
+        for index, intent in enumerate(self.intents):
+            for text in intent.get('examples', []) + intent['keywords']:
+                texts.append(text)
+                labels.append(index)
+        
+        counts = self._count_matrix(texts)
+        # Smoothed inverse document frequency: words used by every intent ("what", "you") weigh little
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        vectors = self._normalize(counts * self.idf)
+        
+        centroids = np.zeros((len(self.intents), features), dtype=np.float32)
+        np.add.at(centroids, np.array(labels), vectors)
+        # Stored transposed, so scoring is one (questions x features) @ (features x intents) product
+        self.centroids = np.ascontiguousarray(self._normalize(centroids).T)
+        
+        self._lock = threading.Lock()
+        self.counts = {'classified': 0, 'fallback': 0}
 
-# Function to list all available products
-def list_all_products():
+    def _features(self, text):
+        lemmas = [token for token in process_text(text) if token.isalnum()]
+        terms = lemmas + [f"{first} {second}" for first, second in zip(lemmas, lemmas[1:])]
+        # crc32 rather than hash(), which changes between processes
+        return [zlib.crc32(term.encode('utf-8')) % self.features for term in terms]
+
+    def _count_matrix(self, texts):
+        matrix = np.zeros((len(texts), self.features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            np.add.at(matrix[row], self._features(text), 1.0)
+        return matrix
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def scores(self, texts):
+        """
+        Returns the cosine similarity of every text to every intent.
+        
+        Args:
+            texts (list): Lowercased questions.
+        
+        Returns:
+            numpy.ndarray: Array of shape (len(texts), number of intents).
+        """
+        return self._normalize(self._count_matrix(texts) * self.idf) @ self.centroids
+
+    @timed_stage('classify')
+    def classify_many(self, texts):
+        """
+        Picks the intent of each text, using the keyword rules where the classifier is unsure.
+        
+        Args:
+            texts (list): Lowercased questions.
+        
+        Returns:
+            list: The matched intent (or None) for each text, in input order.
+        """
+        if not texts:
+            return []
+        scores = self.scores(texts)
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(texts)), best]
+        results = []
+        for text, index, score in zip(texts, best.tolist(), confidence.tolist()):
+            results.append(self.intents[index] if score >= self.threshold else intent_matcher.match(text))
+        classified = int(np.count_nonzero(confidence >= self.threshold))
+        with self._lock:
+            self.counts['classified'] += classified
+            self.counts['fallback'] += len(texts) - classified
+        return results
+
+# Function to build the intent classifier when it is enabled
+def build_intent_classifier(intents):
     """
-    Lists all available products from the database.
+    Builds the classifier if CHATBOT_INTENT_MODE is 'classifier'.
+    
+    Args:
+        intents (list): The intent table.
     
     Returns:
-        str: List of product names.
+        IntentClassifier: The classifier, or None if disabled or if the NLTK data it needs is missing.
     """
-    conn = sqlite3.connect('electronics_store.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM products")
-    products = cursor.fetchall()
-    conn.close()
-    return ", ".join([product[0] for product in products])
+    if INTENT_MODE != 'classifier':
+        return None
+    try:
+        return IntentClassifier(intents)
+    except LookupError as e:
+        logging.warning("Intent classifier disabled, NLTK data missing: %s", e)
+        return None
 
-# Function to get employee details from the database
-def get_employee_details(employee_name):
+intent_classifier = build_intent_classifier(ALL_INTENTS)
+
+# Function to find the intent of several questions at once
+def match_intents(questions):
     """
-    Queries employee details from the database based on the employee name.
+    Finds the intent of each question with the classifier when enabled, otherwise with the keyword rules.
     
     Args:
-        employee_name (str): The name of the employee.
+        questions (list): Lowercased questions.
     
     Returns:
-        str: Employee details or a message if the employee is not found.
+        list: The matched intent (or None) for each question.
+    """
+    if intent_classifier is not None:
+        try:
+            return intent_classifier.classify_many(questions)
+        except LookupError:
+            pass
+    return [intent_matcher.match(question) for question in questions]
+
+# Function to find the intent of one question
+def match_intent(question):
     """
-    conn = sqlite3.connect('electronics_store.db')
-    cursor = conn.cursor()
+    Finds the intent of a single lowercased question (see match_intents).
     
-    cursor.execute("SELECT name, position, email FROM employees WHERE name LIKE ?", ('%' + employee_name + '%',))
-    employee_info = cursor.fetchone()
+    Args:
+        question (str): The lowercased question.
     
-    conn.close()
+    Returns:
+        dict: The matched intent, or None.
+    """
+    return match_intents([question])[0]
+
+# Counters showing which tier of the pipeline answered each question
+class PipelineStats:
+    """
+    Counts how each question was answered, to show how much spaCy work is avoided.
     
-    if employee_info:
-        return f"Employee Name: {employee_info[0]}, Position: {employee_info[1]}, Email: {employee_info[2]}"
-    else:
-        return "Employee not found."
+    Tiers:
+        cache: answered from the response cache.
+        keyword: answered by a keyword intent without running spaCy.
+        entity: answered by an entity rule after running spaCy.
+        keyword_after_ner: answered by a keyword intent after running spaCy.
+        generic: nothing matched; the generic answer was returned after running spaCy.
+    """
 
-# Function to get order details from the database
-def get_order_details(customer_name):
+    TIERS = ('cache', 'keyword', 'entity', 'keyword_after_ner', 'generic')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Sets every counter back to zero.
+        """
+        with self._lock:
+            self.counts = dict.fromkeys(self.TIERS, 0)
+
+    def record(self, tier):
+        """
+        Counts one question answered by the given tier.
+        
+        Args:
+            tier (str): One of TIERS.
+        """
+        with self._lock:
+            self.counts[tier] += 1
+
+    def snapshot(self):
+        """
+        Returns the counters and the share of questions answered by each tier.
+        
+        Returns:
+            dict: Pipeline mode, counts, hit rate per tier, spaCy runs and the share of questions that skipped spaCy.
+        """
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        ner_runs = counts['entity'] + counts['keyword_after_ner'] + counts['generic']
+        return {
+            'mode': PIPELINE_MODE,
+            'total': total,
+            'counts': counts,
+            'hit_rates': {tier: (count / total if total else 0.0) for tier, count in counts.items()},
+            'ner_runs': ner_runs,
+            'ner_avoided_rate': (total - ner_runs) / total if total else 0.0,
+        }
+
+# Shared pipeline counters
+pipeline_stats = PipelineStats()
+
+# Function to answer a matched intent
+def run_intent(intent, question):
     """
-    Queries order details from the database based on the customer name.
+    Produces the answer for a matched intent.
     
     Args:
-        customer_name (str): The name of the customer.
+        intent (dict): The matched intent.
+        question (str): The user's question, already lowercased.
     
     Returns:
-        str: Order details or a message if the order is not found.
+        str: The corresponding response.
+    """
+    if 'handler' in intent:
+        return intent['handler'](question)
+    return intent['response']
+
+# Marks an intent argument that was not passed, since None means "no intent matched"
+_NOT_MATCHED = object()
+
+# Function to answer a question from the keyword intents alone, when that is enough
+def answer_lexically(question, intent=_NOT_MATCHED):
+    """
+    First, cheap tier of the pipeline: answers from a keyword intent that needs no entities.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+        intent (dict): The question's intent if already matched (may be None); matched here if not given.
+    
+    Returns:
+        str: The response, or None if spaCy is needed (entity lookup intent or no match).
+    """
+    if intent is _NOT_MATCHED:
+        intent = match_intent(question)
+    if intent is None or intent.get('needs_entities'):
+        return None
+    log_question("Answered by keyword intent '%s' without entity recognition.", intent['name'])
+    pipeline_stats.record('keyword')
+    record_intent(intent['name'])
+    return run_intent(intent, question)
+
+# Function to pick a response once the question's entities are known
+def answer_from_entities(question, entities, intent=_NOT_MATCHED):
+    """
+    Applies the entity rules and then the keyword intents to a lowercased question; intents
+    marked 'overrides_entities' come before the entity rules.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+        entities (list): Entities detected by spaCy as (text, label) tuples.
+        intent (dict): The question's intent if already matched (may be None); matched here if not given.
+    
+    Returns:
+        str: The corresponding response.
     """
-    conn = sqlite3.connect('electronics_store.db')
-    cursor = conn.cursor()
+    if intent is _NOT_MATCHED:
+        intent = match_intent(question)
+    # Aggregate questions name a customer or product that spaCy would take for an employee or place
+    if intent is not None and intent.get('overrides_entities'):
+        pipeline_stats.record('keyword_after_ner')
+        record_intent(intent['name'])
+        return run_intent(intent, question)
     
-    cursor.execute("SELECT c.name, o.id, o.order_date, o.total FROM customers c JOIN orders o ON c.id = o.customer_id WHERE c.name LIKE ?", ('%' + customer_name + '%',))
-    order_info = cursor.fetchall()
+    # Use entities to improve responses
+    for entity, label in entities:
+        if label == "ORG":
+            pipeline_stats.record('entity')
+            record_intent('entity_org')
+            return f"You mentioned '{entity}'. How can I assist you with this organization?"
+        elif label == "GPE":
+            pipeline_stats.record('entity')
+            record_intent('entity_gpe')
+            return f"You mentioned '{entity}'. Are you asking about a location?"
+        elif label == "PERSON":
+            pipeline_stats.record('entity')
+            record_intent('entity_person')
+            # Use the entity name to query employee details
+            return get_employee_details(entity)
     
-    conn.close()
+    # Check predefined conditions for keywords
+    log_question("Checking predefined conditions...")
+    if intent is not None:
+        pipeline_stats.record('keyword_after_ner')
+        record_intent(intent['name'])
+        return run_intent(intent, question)
     
-    if order_info:
-        response = ""
-        for order in order_info:
-            response += f"Customer Name: {order[0]}, Order ID: {order[1]}, Order Date: {order[2]}, Total: ${order[3]:.2f}\n"
-        return response
-    else:
-        return "Order not found for that customer."
+    # If none of the above conditions match, return a friendly generic message
+    log_question("Returning generic response.")
+    pipeline_stats.record('generic')
+    record_intent('generic')
+    return "I'm sorry, I didn't quite understand that. Could you rephrase or give me more context? I'm here to help!"
 
 # Function to respond to user queries based on predefined rules and database queries
+@with_request_context
+@timed_stage('respond')
 def respond_to_question(question):
     """
     Responds to a user query based on predefined rules and entities detected by spaCy.
@@ -151,71 +1979,132 @@ def respond_to_question(question):
         str: The corresponding response.
     """
     try:
-        logging.info(f"Processing question: {question}")
+        log_question("Processing question: %s", question)
         
-        # Convert the question to lowercase for easier comparison
-        question = question.lower()
+        # Repeated questions are answered from the cache without running spaCy
+        lowered = question.lower()
+        intent = match_intent(lowered)
+        if not RESPONSE_CACHE_ENABLED:
+            return _answer_question(lowered, intent)
         
-        # Process the question with spaCy to identify entities
-        entities = process_question_with_spacy(question)
-        logging.info(f"Entities detected: {entities}")
-        
-        # Use entities to improve responses
-        for entity, label in entities:
-            if label == "ORG":
-                return f"You mentioned '{entity}'. How can I assist you with this organization?"
-            elif label == "GPE":
-                return f"You mentioned '{entity}'. Are you asking about a location?"
-            elif label == "PERSON":
-                # Use the entity name to query employee details
-                return get_employee_details(entity)
-        
-        # Check predefined conditions for keywords
-        logging.info("Checking predefined conditions...")
-        if "hours" in question or "opening hours" in question:
-            return "Our business hours are Monday to Friday, 9am to 5pm. We're closed on weekends and holidays."
-        
-        elif "location" in question or "address" in question:
-            return "We are located at 123 Business Street, Cityville. You can find us easily using GPS or public transportation."
-        
-        elif "price" in question or "cost" in question or "product" in question:
-            # Extract product name from the question (last word as a basic example)
-            product_name = question.split()[-1]
-            return get_product_details(product_name)
-        
-        elif "products available" in question or "what products do you have available" in question:
-            return f"We have the following products available: {list_all_products()}"
-        
-        elif "employee" in question or "employees" in question:
-            # Extract employee name from the question (last word as a basic example)
-            employee_name = question.split()[-1]
-            return get_employee_details(employee_name)
-        
-        elif "order" in question or "orders" in question:
-            words = question.split()
-            customer_name = ' '.join([word for word in words if word not in ["order", "orders", "does", "have"]])
-            return get_order_details(customer_name)
-
-        elif "services" in question:
-            return "We offer consulting, development, and support services. Let us know how we can assist you!"
-        
-        elif "contact" in question or "phone" in question or "email" in question:
-            return "You can reach us by phone at 555-1234 or via email at info@example.com. We're happy to help!"
-        
-        elif "career" in question or "job" in question:
-            return "We're always looking for talented individuals to join our team. Check our careers page for current openings."
-        
-        elif "faq" in question:
-            return "Please visit our FAQs page for answers to frequently asked questions. If you can't find what you're looking for, feel free to ask us directly."
-        
-        # If none of the above conditions match, return a friendly generic message
-        logging.info("Returning generic response.")
-        return "I'm sorry, I didn't quite understand that. Could you rephrase or give me more context? I'm here to help!"
+        key = normalize_question(lowered, intent)
+        version = response_cache.invalidations
+        response = response_cache.get(key)
+        if response is None:
+            response = _answer_question(lowered, intent)
+            response_cache.put(key, response, version)
+        else:
+            log_question("Answered from response cache.")
+            pipeline_stats.record('cache')
+            record_intent('cache')
+        return response
     
     except Exception as e:
-        logging.error(f"Error processing question: {e}")
+        logging.error("Error processing question: %s", e)
         return "I'm sorry, I didn't quite understand that. Could you rephrase or give me more context? I'm here to help!"
 
+# Function to run the full NLP and rule pipeline for a single question
+def _answer_question(question, intent=_NOT_MATCHED):
+    """
+    Answers a question with spaCy and the predefined rules, without using the response cache.
+    
+    Args:
+        question (str): The user's question, already lowercased.
+        intent (dict): The question's intent if already matched (may be None); matched here if not given.
+    
+    Returns:
+        str: The corresponding response.
+    """
+    # In the tiered pipeline, questions a keyword intent can answer on its own skip spaCy
+    if PIPELINE_MODE == 'tiered':
+        response = answer_lexically(question, intent)
+        if response is not None:
+            return response
+    
+    # Process the question with spaCy to identify entities
+    entities = process_question_with_spacy(question)
+    log_question("Entities detected: %s", entities)
+    
+    return answer_from_entities(question, entities, intent)
+
+# Function to respond to many user queries at once
+@with_request_context
+def respond_to_questions(questions, batch_size=64, n_process=1):
+    """
+    Responds to a list of user queries, running spaCy over all of them with nlp.pipe.
+    
+    Gives the same answers as calling respond_to_question on each question.
+    
+    Args:
+        questions (list): The users' questions.
+        batch_size (int): Number of texts spaCy buffers per batch.
+        n_process (int): Number of worker processes used by spaCy.
+    
+    Returns:
+        list: The corresponding responses, in input order.
+    """
+    log_question("Processing batch of %d questions", len(questions))
+    responses = [None] * len(questions)
+    keys = [None] * len(questions)
+    version = response_cache.invalidations
+    
+    # Match the intents of all questions together (one matrix multiply with the classifier);
+    # the cache key depends on the intent
+    try:
+        intents = match_intents([question.lower() for question in questions])
+    except Exception as e:
+        logging.error("Error matching intents: %s", e)
+        intents = [_NOT_MATCHED] * len(questions)
+    
+    # Answer what we can from the response cache; only the misses go through spaCy
+    pending = []
+    for i, question in enumerate(questions):
+        if RESPONSE_CACHE_ENABLED and intents[i] is not _NOT_MATCHED:
+            keys[i] = normalize_question(question.lower(), intents[i])
+            responses[i] = response_cache.get(keys[i])
+            if responses[i] is not None:
+                pipeline_stats.record('cache')
+                record_intent('cache')
+        if responses[i] is None:
+            pending.append(i)
+    
+    # In the tiered pipeline, questions a keyword intent can answer on its own skip spaCy
+    if PIPELINE_MODE == 'tiered':
+        needs_ner = []
+        for i in pending:
+            try:
+                responses[i] = answer_lexically(questions[i].lower(), intents[i])
+            except Exception as e:
+                logging.error("Error processing question: %s", e)
+                responses[i] = "I'm sorry, I didn't quite understand that. Could you rephrase or give me more context? I'm here to help!"
+                continue
+            if responses[i] is None:
+                needs_ner.append(i)
+            elif keys[i] is not None:
+                response_cache.put(keys[i], responses[i], version)
+        pending = needs_ner
+    
+    lowered = [questions[i].lower() for i in pending]
+    try:
+        all_entities = process_questions_with_spacy(lowered, batch_size=batch_size, n_process=n_process)
+    except Exception as e:
+        logging.error("Error processing batch, falling back to single questions: %s", e)
+        for i in pending:
+            responses[i] = respond_to_question(questions[i])
+        return responses
+    
+    for i, question, entities in zip(pending, lowered, all_entities):
+        try:
+            log_question("Processing question: %s", question)
+            log_question("Entities detected: %s", entities)
+            responses[i] = answer_from_entities(question, entities, intents[i])
+            if keys[i] is not None:
+                response_cache.put(keys[i], responses[i], version)
+        except Exception as e:
+            logging.error("Error processing question: %s", e)
+            responses[i] = "I'm sorry, I didn't quite understand that. Could you rephrase or give me more context? I'm here to help!"
+    return responses
+
 # HTML template for chatbot interface (simple and clean design)
 template = """
 <!DOCTYPE html>
@@ -223,39 +2112,7 @@ template = """
 <head>
 <title>Chatbot</title>
 <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-1BmE4kWBq78iYhFldvKuhfTAU6auU8tT94WrHftjDbrCEXSU1oBoqyl2QvZ6jIW3" crossorigin="anonymous">
-<style>
-body {
-    background: #f0f0f0;
-    font-family: Arial, sans-serif;
-}
-.container {
-    margin-top: 50px;
-}
-.chatbox {
-    background-color: white;
-    padding: 20px;
-    border-radius: 10px;
-    box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
-}
-h1 {
-    color: #00698f;
-    text-align: center;
-}
-#chat-history {
-    margin-top: 20px;
-    background-color: #e9ecef;
-    padding: 15px;
-    border-radius: 10px;
-    max-height: 300px;
-    overflow-y: auto;
-}
-.chat-entry {
-    margin-bottom: 10px;
-}
-.chat-entry strong {
-    color: #00698f;
-}
-</style>
+<link href="/static/styles.css?v={{ css_version }}" rel="stylesheet">
 </head>
 <body>
 <nav class="navbar navbar-expand-lg navbar-light bg-light">
@@ -274,7 +2131,7 @@ h1 {
       <button type="submit" class="btn btn-success w-100">Send</button>
     </form>
 
-    {% if respuesta %}
+    {% if respuesta or chat_history %}
     <div id="chat-history">
       {% for entry in chat_history %}
       <div class="chat-entry">
@@ -282,10 +2139,12 @@ h1 {
         <p><strong>Chatbot:</strong> {{ entry.response }}</p>
       </div>
       {% endfor %}
+      {% if respuesta %}
       <div class="chat-entry">
         <p><strong>You:</strong> {{ pregunta }}</p>
         <p><strong>Chatbot:</strong> {{ respuesta }}</p>
       </div>
+      {% endif %}
     </div>
     {% endif %}
     
@@ -297,31 +2156,374 @@ h1 {
 </html>
 """
 
-# Create a Flask application instance
-app = Flask(__name__)
+# In-memory copy of a page or file, served with HTTP caching headers
+class StaticAsset:
+    """
+    Holds a response body, gzipped once up front, with its ETag and Last-Modified date.
+    
+    Args:
+        body (bytes): The content.
+        content_type (str): Value of the Content-Type header.
+        last_modified (float): Modification time (seconds since the epoch).
+    """
+
+    def __init__(self, body, content_type, last_modified):
+        self.body = body
+        self.content_type = content_type
+        self.last_modified = int(last_modified)
+        self.version = hashlib.sha1(body).hexdigest()[:16]
+        # Only text compresses well; keep the gzip copy only when it is actually smaller
+        gzipped = gzip.compress(body, 9, mtime=0) if content_type.startswith(('text/', 'application/json', 'application/javascript')) else None
+        self.gzipped = gzipped if gzipped is not None and len(gzipped) < len(body) else None
+
+    def respond(self, if_none_match=None, if_modified_since=None, accept_encoding=None, cache_control='no-cache'):
+        """
+        Builds the response for a request, honoring conditional and gzip request headers.
+        
+        Args:
+            if_none_match (str): The If-None-Match header, if any.
+            if_modified_since (str): The If-Modified-Since header, if any.
+            accept_encoding (str): The Accept-Encoding header, if any.
+            cache_control (str): Value of the Cache-Control header.
+        
+        Returns:
+            tuple: (status code, headers dictionary, body bytes).
+        """
+        use_gzip = self.gzipped is not None and parse_accept_header(accept_encoding)['gzip'] > 0
+        # Each encoding is a different representation, so each gets its own ETag
+        etag = self.version + '-gzip' if use_gzip else self.version
+        headers = {
+            'Content-Type': self.content_type,
+            'ETag': quote_etag(etag),
+            'Last-Modified': http_date(self.last_modified),
+            'Cache-Control': cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if if_none_match:
+            # If-None-Match takes precedence over If-Modified-Since when both are sent
+            not_modified = parse_etags(if_none_match).contains_weak(etag)
+        else:
+            since = parse_date(if_modified_since) if if_modified_since else None
+            not_modified = since is not None and since.timestamp() >= self.last_modified
+        if not_modified:
+            return 304, headers, b''
+        
+        body = self.gzipped if use_gzip else self.body
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+        headers['Content-Length'] = str(len(body))
+        return 200, headers, body
+
+# Function to load the static files into memory
+def load_static_assets(directory=Path(__file__).resolve().parent / 'static'):
+    """
+    Reads every file under the static directory once, at startup.
+    
+    Args:
+        directory (Path): The static directory.
+    
+    Returns:
+        dict: URL path relative to /static/ -> StaticAsset.
+    """
+    assets = {}
+    for path in sorted(directory.rglob('*')):
+        if path.is_file():
+            content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+            if content_type.startswith('text/'):
+                content_type += '; charset=utf-8'
+            assets[path.relative_to(directory).as_posix()] = StaticAsset(path.read_bytes(), content_type, path.stat().st_mtime)
+    return assets
+
+static_assets = load_static_assets()
+
+# The stylesheet's URL carries its content hash, so browsers can keep it until it changes
+CSS_VERSION = static_assets['styles.css'].version if 'styles.css' in static_assets else ''
+
+# Create a Flask application instance; static files are served from memory by static_file() below
+app = Flask(__name__, static_folder=None)
+
+# The chat page template, compiled once instead of on every request
+page_template = app.jinja_env.from_string(template)
+
+# Function to render the chat page
+@timed_stage('render')
+def render_page(**context):
+    """
+    Renders the chatbot page template.
+    
+    Returns:
+        str: The HTML page.
+    """
+    return page_template.render(css_version=CSS_VERSION, **context)
+
+# The chat page as first shown, before any question, is the same for every visitor
+index_asset = StaticAsset(page_template.render(css_version=CSS_VERSION).encode('utf-8'), 'text/html; charset=utf-8',
+                          os.path.getmtime(__file__))
+
+# Function to turn a StaticAsset into a Flask response for the current request
+def asset_response(asset, cache_control='no-cache'):
+    """
+    Serves an in-memory asset, answering 304 Not Modified when the client's copy is current.
+    
+    Args:
+        asset (StaticAsset): The asset.
+        cache_control (str): Value of the Cache-Control header.
+    
+    Returns:
+        Response: The Flask response.
+    """
+    status, headers, body = asset.respond(request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since'),
+                                          request.headers.get('Accept-Encoding'), cache_control)
+    return Response(body, status, headers)
+
+# Recent conversation history of each visitor, keyed by a cookie
+session_store = SessionStore()
 
 # Define the main route for handling chatbot interactions
 @app.route('/', methods=['GET', 'POST'])
+@with_request_context
+@timed_stage('request')
 def index():
     """
     Handles user interactions with the chatbot via GET and POST requests.
     
     Returns:
-        str: Rendered HTML template with chatbot responses.
+        Response: The chat page with the visitor's conversation and the chatbot's response.
     """
+    session_id, new_session = session_id_from_cookie(request.cookies.get(SESSION_COOKIE))
+    chat_history = [] if new_session else session_store.history(session_id)
+    
     if request.method == 'POST':
         # Get the user's input from the form data
         question = request.form['pregunta']
         
         # Generate a response based on the user's input
         response = respond_to_question(question)
+        session_store.append(session_id, question, response, current_intent())
         
-        # Render the template with the chatbot's response
-        return render_template_string(template, respuesta=response)
+        # Render the template with the earlier exchanges and the chatbot's response
+        page = make_response(render_page(respuesta=response, pregunta=question, chat_history=chat_history))
+        if new_session:
+            page.set_cookie(SESSION_COOKIE, session_id, max_age=int(SESSION_SPILL_TTL), httponly=True, samesite='Lax')
+        return page
+    
+    elif chat_history:
+        # Render the template with the earlier exchanges
+        page = make_response(render_page(chat_history=chat_history))
+        page.headers['Cache-Control'] = 'private, no-store'
+        return page
     
     else:
-        # Render the template without a response for GET requests
-        return render_template_string(template)
+        # Without a conversation the page is always the same: serve the prerendered copy
+        return asset_response(index_asset)
+
+# Define a JSON route for answering a single question without rendering HTML
+@app.route('/api/answer', methods=['POST'])
+def answer_api():
+    """
+    Answers one question sent as JSON, for programmatic clients.
+    
+    Expects a body like {"question": "..."}.
+    
+    Returns:
+        Response: JSON with the answer.
+    """
+    payload = request.get_json(silent=True)
+    question = payload.get('question') if isinstance(payload, dict) else None
+    if not isinstance(question, str):
+        return jsonify({"error": "'question' must be a string"}), 400
+    return jsonify({"answer": respond_to_question(question)})
+
+# Define a JSON route for answering many questions in one request
+@app.route('/api/answer/batch', methods=['POST'])
+def answer_batch():
+    """
+    Answers a batch of questions sent as JSON.
+    
+    Expects a body like {"questions": [...], "batch_size": 64, "n_process": 1} with at most
+    BATCH_MAX_QUESTIONS questions; batch_size and n_process are optional and capped at
+    BATCH_MAX_SIZE and BATCH_MAX_PROCESSES.
+    
+    Returns:
+        Response: JSON with the answers in the same order as the questions.
+    """
+    payload = request.get_json(silent=True)
+    questions = payload.get('questions') if isinstance(payload, dict) else None
+    if not isinstance(questions, list) or not all(isinstance(question, str) for question in questions):
+        return jsonify({"error": "'questions' must be a list of strings"}), 400
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return jsonify({"error": f"at most {BATCH_MAX_QUESTIONS} questions per request"}), 400
+    
+    batch_size = payload.get('batch_size', 64)
+    n_process = payload.get('n_process', 1)
+    # bool is a subclass of int, and floats such as 2.5 must not be truncated silently
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in (batch_size, n_process)):
+        return jsonify({"error": "'batch_size' and 'n_process' must be integers"}), 400
+    if batch_size < 1 or n_process < 1:
+        return jsonify({"error": "'batch_size' and 'n_process' must be positive"}), 400
+    
+    # Clients must not be able to make the server fork any number of spaCy processes
+    answers = respond_to_questions(questions, batch_size=min(batch_size, BATCH_MAX_SIZE),
+                                   n_process=min(n_process, BATCH_MAX_PROCESSES))
+    return jsonify({"answers": answers})
+
+# Function to read the paging parameters of a listing request
+def _page_args():
+    """
+    Reads 'after' and 'limit' from the query string.
+    
+    Returns:
+        tuple: (after, limit), or None if they are not valid.
+    """
+    try:
+        after = int(request.args.get('after', 0))
+        limit = int(request.args.get('limit', PAGE_SIZE))
+    except ValueError:
+        return None
+    if after < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        return None
+    return after, limit
+
+# Function to stream rows as JSON lines
+def _stream_json_lines(rows):
+    """
+    Streams one JSON object per line, so the client gets the first rows before the rest are read.
+    
+    Args:
+        rows (iterable): Dictionaries to send, typically produced page by page from the database.
+    
+    Returns:
+        Response: A chunked application/x-ndjson response.
+    """
+    return Response(stream_with_context(json.dumps(row) + "\n" for row in rows), mimetype='application/x-ndjson')
+
+# Define a JSON route listing products a page at a time
+@app.route('/api/products', methods=['GET'])
+def products_route():
+    """
+    Lists products: one page as JSON, or with stream=1 every product after 'after' as streamed JSON lines.
+    
+    Query parameters: after (last id seen, default 0), limit (page size), stream (1 to stream).
+    
+    Returns:
+        Response: {"products": [{"id": ..., "name": ...}], "next_after": id or null}, or JSON lines.
+    """
+    paging = _page_args()
+    if paging is None:
+        return jsonify({"error": f"'after' must be a non-negative integer and 'limit' between 1 and {MAX_PAGE_SIZE}"}), 400
+    after, limit = paging
+    if request.args.get('stream') == '1':
+        return _stream_json_lines({"id": product_id, "name": name} for product_id, name in iter_products(after, limit))
+    rows, next_after = get_products_page(after, limit)
+    return jsonify({"products": [{"id": product_id, "name": name} for product_id, name in rows], "next_after": next_after})
+
+# Define a JSON route listing a customer's orders a page at a time
+@app.route('/api/orders', methods=['GET'])
+def orders_route():
+    """
+    Lists the orders of the customers matching a name: one page as JSON, or with stream=1 as streamed JSON lines.
+    
+    Query parameters: customer (required), after (last order id seen, default 0), limit (page size), stream (1 to stream).
+    
+    Returns:
+        Response: {"orders": [...], "next_after": id or null}, or JSON lines.
+    """
+    customer_name = request.args.get('customer', '').strip()
+    if not customer_name:
+        return jsonify({"error": "'customer' is required"}), 400
+    paging = _page_args()
+    if paging is None:
+        return jsonify({"error": f"'after' must be a non-negative integer and 'limit' between 1 and {MAX_PAGE_SIZE}"}), 400
+    after, limit = paging
+    
+    def as_dict(order):
+        return {"customer": order[0], "order_id": order[1], "order_date": order[2], "total": order[3]}
+    if request.args.get('stream') == '1':
+        return _stream_json_lines(as_dict(order) for order in iter_orders(customer_name, after, limit))
+    rows, next_after = get_orders_page(customer_name, after, limit)
+    return jsonify({"orders": [as_dict(order) for order in rows], "next_after": next_after})
+
+# Define a route serving the static files from memory
+@app.route('/static/<path:filename>', methods=['GET'])
+def static_file(filename):
+    """
+    Serves a file from the static directory with ETag, Last-Modified and gzip.
+    
+    Requests whose 'v' parameter matches the file's current version may be cached for a year.
+    
+    Args:
+        filename (str): Path of the file under static/.
+    
+    Returns:
+        Response: The file, 304 Not Modified, or 404.
+    """
+    asset = static_assets.get(filename)
+    if asset is None:
+        return jsonify({"error": "Not found"}), 404
+    if request.args.get('v') == asset.version:
+        return asset_response(asset, 'public, max-age=31536000, immutable')
+    return asset_response(asset)
+
+# Define a JSON route exposing the cache counters
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Returns the catalog and response cache counters and the session store counters.
+    
+    Returns:
+        Response: JSON with hits, misses, evictions, invalidations and size for each cache, the session store counters
+            and, in 'memory' mode, the database snapshot counters.
+    """
+    stats = {"catalog": catalog_cache.stats(), "responses": response_cache.stats(), "sessions": session_store.stats()}
+    if isinstance(db, SnapshotConnectionManager):
+        stats["database"] = db.stats()
+    return jsonify(stats)
+
+# Define a JSON route exposing how many questions each pipeline tier answered
+@app.route('/api/pipeline/stats', methods=['GET'])
+def pipeline_stats_route():
+    """
+    Returns the per-tier pipeline counters and hit rates.
+    
+    Returns:
+        Response: JSON with the counts, hit rates and how often spaCy was skipped.
+    """
+    snapshot = pipeline_stats.snapshot()
+    if intent_classifier is not None:
+        snapshot['classifier'] = dict(intent_classifier.counts)
+    return jsonify(snapshot)
+
+# Define a route exposing metrics in the Prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    """
+    Returns stage latency histograms, intent counters, pipeline tier counters,
+    cache counters and startup timings in the Prometheus text exposition format.
+    
+    Returns:
+        Response: The metrics as plain text.
+    """
+    lines = metrics.render()
+    
+    tiers = pipeline_stats.snapshot()['counts']
+    lines += ["# HELP chatbot_pipeline_tier_total Questions answered by each pipeline tier.",
+              "# TYPE chatbot_pipeline_tier_total counter"]
+    lines += [f'chatbot_pipeline_tier_total{{tier="{tier}"}} {count}' for tier, count in tiers.items()]
+    
+    caches = {'catalog': catalog_cache.stats(), 'responses': response_cache.stats()}
+    for counter in ('hits', 'misses', 'evictions', 'invalidations'):
+        lines += [f"# HELP chatbot_cache_{counter}_total Cache {counter}.",
+                  f"# TYPE chatbot_cache_{counter}_total counter"]
+        lines += [f'chatbot_cache_{counter}_total{{cache="{name}"}} {stats[counter]}' for name, stats in caches.items()]
+    lines += ["# HELP chatbot_cache_size Entries currently cached.",
+              "# TYPE chatbot_cache_size gauge"]
+    lines += [f'chatbot_cache_size{{cache="{name}"}} {stats["size"]}' for name, stats in caches.items()]
+    
+    lines += ["# HELP chatbot_startup_seconds Time spent in each startup phase.",
+              "# TYPE chatbot_startup_seconds gauge"]
+    lines += [f'chatbot_startup_seconds{{phase="{phase}"}} {seconds}' for phase, seconds in STARTUP_TIMINGS.items()]
+    
+    return "\n".join(lines) + "\n", 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 # Run the application if executed directly (development mode enabled)
 if __name__ == '__main__':
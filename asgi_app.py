@@ -0,0 +1,397 @@
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+# The server and each spaCy worker process import app.py; unless told otherwise each writes
+# its own log file ('{pid}' is replaced by the process id), since they cannot share one rotated file
+os.environ.setdefault('CHATBOT_LOG_FILE', 'chatbot-{pid}.log')
+
+import app as chatbot
+from sessions import SESSION_COOKIE, SESSION_SPILL_TTL, session_id_from_cookie
+from werkzeug.http import dump_cookie, parse_cookie
+
+# Serving settings: spaCy worker processes, SQLite worker threads, and how many requests may be in progress at once
+NER_WORKERS = int(os.environ.get('CHATBOT_NER_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+DB_THREADS = int(os.environ.get('CHATBOT_DB_THREADS', 8))
+MAX_IN_FLIGHT = int(os.environ.get('CHATBOT_MAX_IN_FLIGHT', 64))
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1024 * 1024
+
+GENERIC_RESPONSE = "I'm sorry, I didn't quite understand that. Could you rephrase or give me more context? I'm here to help!"
+
+# Worker pools and the in-flight limit, created when the server starts
+_ner_executor = None
+_db_executor = None
+_in_flight = None
+
+# Function run in the spaCy worker processes
+def extract_entities(question):
+    """
+    Runs spaCy entity recognition on a question. Executed in the worker process pool.
+
+    The metrics served by /metrics live in the server process, so the worker only
+    measures the call and the server records it as the 'ner' stage.
+
+    Args:
+        question (str): The user's question, already lowercased.
+
+    Returns:
+        tuple: (entities as (text, label) tuples, seconds spent in spaCy).
+    """
+    recognize = getattr(chatbot.process_question_with_spacy, '__wrapped__', chatbot.process_question_with_spacy)
+    start = time.perf_counter()
+    entities = recognize(question)
+    return entities, time.perf_counter() - start
+
+# Function to run a blocking call in the SQLite thread pool
+def run_in_db_thread(func, *args):
+    """
+    Runs func(*args) in the SQLite thread pool, inside a copy of the caller's context,
+    so intents and stage timings recorded in the thread reach the current request.
+
+    Args:
+        func (callable): The function to run.
+        *args: Its arguments.
+
+    Returns:
+        asyncio.Future: Resolves to the function's result.
+    """
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return asyncio.get_running_loop().run_in_executor(_db_executor, call)
+
+# Function run in the SQLite thread pool to answer without spaCy when possible
+def answer_without_ner(question):
+    """
+    Matches the intent, then tries the response cache and, in the tiered pipeline, the keyword intents.
+
+    Args:
+        question (str): The user's question, already lowercased.
+
+    Returns:
+        tuple: (intent, cache key, cache version, response); response is None if spaCy is needed.
+    """
+    intent = chatbot.match_intent(question)
+    key = chatbot.normalize_question(question, intent) if chatbot.RESPONSE_CACHE_ENABLED else None
+    version = chatbot.response_cache.invalidations
+    if key is not None:
+        response = chatbot.response_cache.get(key)
+        if response is not None:
+            chatbot.log_question("Answered from response cache.")
+            chatbot.pipeline_stats.record('cache')
+            chatbot.record_intent('cache')
+            return intent, key, version, response
+
+    response = None
+    if chatbot.PIPELINE_MODE == 'tiered':
+        response = chatbot.answer_lexically(question, intent)
+        if response is not None and key is not None:
+            chatbot.response_cache.put(key, response, version)
+    return intent, key, version, response
+
+# Async version of respond_to_question that keeps spaCy and SQLite off the event loop
+async def answer_question(question, request_id=None):
+    """
+    Answers a question. Entity recognition runs in the process pool and database
+    lookups in the thread pool, so a slow NER call never blocks cheap questions.
+    Like respond_to_question, the answer is given in a request context (the
+    caller's, if one is open), so it is logged and counted the same way.
+
+    Args:
+        question (str): The user's question.
+        request_id (str): Id from the X-Request-ID header, if any.
+
+    Returns:
+        str: The corresponding response.
+    """
+    loop = asyncio.get_running_loop()
+    async with _in_flight:
+        with chatbot.request_context(request_id):
+            try:
+                chatbot.log_question("Processing question: %s", question)
+                question = question.lower()
+                intent, key, version, response = await run_in_db_thread(answer_without_ner, question)
+                if response is not None:
+                    return response
+
+                entities, seconds = await loop.run_in_executor(_ner_executor, extract_entities, question)
+                chatbot.record_stage('ner', seconds)
+                chatbot.log_question("Entities detected: %s", entities)
+                response = await run_in_db_thread(chatbot.answer_from_entities, question, entities, intent)
+                if key is not None:
+                    chatbot.response_cache.put(key, response, version)
+                return response
+
+            except Exception as e:
+                logging.error("Error processing question: %s", e)
+                return GENERIC_RESPONSE
+
+# Function to start the worker pools
+def start_pools(ner_workers=NER_WORKERS, db_threads=DB_THREADS, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Creates the spaCy process pool, the SQLite thread pool and the in-flight request limit.
+
+    Args:
+        ner_workers (int): Number of spaCy worker processes.
+        db_threads (int): Number of SQLite worker threads.
+        max_in_flight (int): Maximum number of requests being answered at once.
+    """
+    global _ner_executor, _db_executor, _in_flight
+    # Spawned workers import app.py themselves, so nothing is inherited from the server's threads
+    _ner_executor = ProcessPoolExecutor(max_workers=ner_workers, mp_context=multiprocessing.get_context('spawn'))
+    _db_executor = ThreadPoolExecutor(max_workers=db_threads, thread_name_prefix='chatbot-db')
+    _in_flight = asyncio.Semaphore(max_in_flight)
+
+# Function to stop the worker pools
+def stop_pools():
+    """
+    Shuts down the worker pools and closes the database connections.
+    """
+    global _ner_executor, _db_executor
+    if _ner_executor is not None:
+        _ner_executor.shutdown(cancel_futures=True)
+        _ner_executor = None
+    if _db_executor is not None:
+        _db_executor.shutdown(cancel_futures=True)
+        _db_executor = None
+    chatbot.close_db_connections()
+
+# Helpers to read requests and send responses with the raw ASGI interface
+async def read_body(receive):
+    """
+    Reads the whole request body.
+
+    Args:
+        receive (callable): ASGI receive function.
+
+    Returns:
+        bytes: The body, or None if it is larger than MAX_BODY_SIZE.
+    """
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_SIZE:
+            return None
+        more_body = message.get('more_body', False)
+    return body
+
+async def send_response(send, status, body, content_type, headers=()):
+    """
+    Sends a complete HTTP response.
+
+    Args:
+        send (callable): ASGI send function.
+        status (int): HTTP status code.
+        body (bytes): Response body.
+        content_type (str): Value of the Content-Type header.
+        headers (iterable): Extra (name, value) header string pairs.
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())]
+                   + [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def read_headers(scope):
+    """
+    Returns the request headers of a scope as a dictionary with lowercase names.
+
+    Args:
+        scope (dict): ASGI connection scope.
+
+    Returns:
+        dict: Header name -> value.
+    """
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+
+async def send_asset(scope, send, asset, cache_control='no-cache'):
+    """
+    Sends an in-memory asset from app.py with ETag, Last-Modified and gzip, or 304 Not Modified.
+
+    Args:
+        scope (dict): ASGI connection scope, for the request headers.
+        send (callable): ASGI send function.
+        asset (app.StaticAsset): The asset.
+        cache_control (str): Value of the Cache-Control header.
+    """
+    request_headers = read_headers(scope)
+    status, headers, body = asset.respond(request_headers.get('if-none-match'), request_headers.get('if-modified-since'),
+                                          request_headers.get('accept-encoding'), cache_control)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def send_json(send, status, data):
+    """
+    Sends a JSON response.
+
+    Args:
+        send (callable): ASGI send function.
+        status (int): HTTP status code.
+        data: JSON-serializable response data.
+    """
+    await send_response(send, status, json.dumps(data).encode(), 'application/json')
+
+# Route handlers
+async def index(scope, body, send):
+    """
+    Serves the chat page with the visitor's conversation, answering the form question on POST,
+    like the Flask index() view.
+    """
+    request_headers = read_headers(scope)
+    cookies = parse_cookie(request_headers.get('cookie', ''))
+    session_id, new_session = session_id_from_cookie(cookies.get(SESSION_COOKIE))
+    # The session store may read its spill file, so it runs off the event loop
+    chat_history = [] if new_session else await run_in_db_thread(chatbot.session_store.history, session_id)
+
+    if scope['method'] == 'POST':
+        form = parse_qs(body.decode('utf-8', 'replace'))
+        question = form.get('pregunta', [''])[0]
+        with chatbot.request_context(request_headers.get('x-request-id')):
+            response = await answer_question(question)
+            await run_in_db_thread(chatbot.session_store.append, session_id, question, response, chatbot.current_intent())
+        html = chatbot.render_page(respuesta=response, pregunta=question, chat_history=chat_history)
+        headers = []
+        if new_session:
+            headers.append(('Set-Cookie', dump_cookie(SESSION_COOKIE, session_id, max_age=int(SESSION_SPILL_TTL),
+                                                      httponly=True, samesite='Lax')))
+        await send_response(send, 200, html.encode(), 'text/html; charset=utf-8', headers)
+    elif chat_history:
+        html = chatbot.render_page(chat_history=chat_history)
+        await send_response(send, 200, html.encode(), 'text/html; charset=utf-8', [('Cache-Control', 'private, no-store')])
+    else:
+        await send_asset(scope, send, chatbot.index_asset)
+
+async def static_file(scope, body, send):
+    """
+    Serves a file from the static directory, like the Flask /static/ route.
+    """
+    asset = chatbot.static_assets.get(scope['path'][len('/static/'):])
+    if asset is None:
+        await send_json(send, 404, {"error": "Not found"})
+        return
+    version = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('v', [None])[0]
+    await send_asset(scope, send, asset, 'public, max-age=31536000, immutable' if version == asset.version else 'no-cache')
+
+async def api_answer(scope, body, send):
+    """
+    Answers one question sent as JSON: {"question": "..."} -> {"answer": "..."}.
+    """
+    payload = _parse_json(body)
+    question = payload.get('question') if isinstance(payload, dict) else None
+    if not isinstance(question, str):
+        await send_json(send, 400, {"error": "'question' must be a string"})
+        return
+    await send_json(send, 200, {"answer": await answer_question(question, read_headers(scope).get('x-request-id'))})
+
+async def api_answer_batch(scope, body, send):
+    """
+    Answers a list of questions sent as JSON: {"questions": [...]} -> {"answers": [...]}.
+    """
+    payload = _parse_json(body)
+    questions = payload.get('questions') if isinstance(payload, dict) else None
+    if not isinstance(questions, list) or not all(isinstance(question, str) for question in questions):
+        await send_json(send, 400, {"error": "'questions' must be a list of strings"})
+        return
+    if len(questions) > chatbot.BATCH_MAX_QUESTIONS:
+        await send_json(send, 400, {"error": f"at most {chatbot.BATCH_MAX_QUESTIONS} questions per request"})
+        return
+    # One request context for the whole batch, like respond_to_questions
+    with chatbot.request_context(read_headers(scope).get('x-request-id')):
+        answers = await asyncio.gather(*(answer_question(question) for question in questions))
+    await send_json(send, 200, {"answers": list(answers)})
+
+async def metrics(scope, body, send):
+    """
+    Serves the same Prometheus metrics as the Flask /metrics route.
+    """
+    text, status, headers = chatbot.metrics_route()
+    await send_response(send, status, text.encode(), headers['Content-Type'])
+
+def _parse_json(body):
+    try:
+        return json.loads(body or b'null')
+    except ValueError:
+        return None
+
+# Routes: path -> (allowed methods, handler)
+ROUTES = {
+    '/': (('GET', 'POST'), index),
+    '/api/answer': (('POST',), api_answer),
+    '/api/answer/batch': (('POST',), api_answer_batch),
+    '/metrics': (('GET',), metrics),
+}
+
+# The ASGI application
+async def app(scope, receive, send):
+    """
+    ASGI entry point serving the chat page and the JSON API.
+
+    Args:
+        scope (dict): ASGI connection scope.
+        receive (callable): ASGI receive function.
+        send (callable): ASGI send function.
+    """
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                start_pools()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                stop_pools()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    route = ROUTES.get(scope['path'])
+    if route is None and scope['path'].startswith('/static/'):
+        route = (('GET',), static_file)
+    if route is None:
+        await send_json(send, 404, {"error": "Not found"})
+        return
+    methods, handler = route
+    if scope['method'] not in methods:
+        await send_json(send, 405, {"error": "Method not allowed"})
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        await send_json(send, 413, {"error": "Request body too large"})
+        return
+    await handler(scope, body, send)
+
+# Run the async server if executed directly (requires uvicorn: pip install uvicorn)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the chatbot with an ASGI server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--ner-workers', type=int, default=NER_WORKERS, help="Number of spaCy worker processes.")
+    parser.add_argument('--db-threads', type=int, default=DB_THREADS, help="Number of SQLite worker threads.")
+    parser.add_argument('--max-in-flight', type=int, default=MAX_IN_FLIGHT, help="Maximum number of requests answered at once.")
+    args = parser.parse_args()
+
+    # uvicorn imports the application module afresh, so pass the settings through the environment
+    os.environ['CHATBOT_NER_WORKERS'] = str(args.ner_workers)
+    os.environ['CHATBOT_DB_THREADS'] = str(args.db_threads)
+    os.environ['CHATBOT_MAX_IN_FLIGHT'] = str(args.max_in_flight)
+
+    import uvicorn
+    uvicorn.run('asgi_app:app', host=args.host, port=args.port)
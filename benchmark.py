@@ -0,0 +1,332 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import app
+
+# Question corpus: one JSON object per line with 'question' and the 'branch' of respond_to_question it exercises
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_questions.jsonl')
+
+# Pipeline stages timed during a run: stage name -> functions in app.py counted towards it
+STAGES = {
+    'normalize': ['normalize_question'],
+    'ner': ['process_question_with_spacy', 'process_questions_with_spacy'],
+    'db': ['get_product_details', 'get_employee_details', 'get_products_page', 'get_orders_page',
+           'get_customer_spending', 'get_best_sellers', 'get_product_rating'],
+    'render': ['render_page'],
+}
+
+# Function to load the question corpus
+def load_corpus(path=CORPUS_PATH):
+    """
+    Reads the benchmark questions.
+
+    Args:
+        path (str): Path to the JSON-lines corpus.
+
+    Returns:
+        list: Dictionaries with 'question' and 'branch'.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Function to compute a percentile
+def percentile(sorted_values, fraction):
+    """
+    Returns the value at the given fraction of a sorted list (nearest rank).
+
+    Args:
+        sorted_values (list): Values in ascending order.
+        fraction (float): Between 0 and 1.
+
+    Returns:
+        float: The percentile, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+# Wall-clock timers around the app.py functions of each stage
+class StageTimer:
+    """
+    Temporarily wraps the functions listed in STAGES to add up the time spent in each stage.
+
+    Timings are totals over all threads; nested calls (for example the employee lookup
+    made from an entity rule) are counted in their own stage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._originals = {}
+        # The keyword stage is the intent matcher, a method rather than a module function
+        self.seconds = dict.fromkeys(list(STAGES) + ['keyword'], 0.0)
+        self.calls = dict.fromkeys(list(STAGES) + ['keyword'], 0)
+
+    def _wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.seconds[stage] += elapsed
+                    self.calls[stage] += 1
+        return timed
+
+    def __enter__(self):
+        for stage, names in STAGES.items():
+            for name in names:
+                self._originals[name] = getattr(app, name)
+                setattr(app, name, self._wrap(stage, self._originals[name]))
+        self._originals['intent_matcher.match'] = app.intent_matcher.match
+        app.intent_matcher.match = self._wrap('keyword', app.intent_matcher.match)
+        return self
+
+    def __exit__(self, *exc_info):
+        app.intent_matcher.match = self._originals.pop('intent_matcher.match')
+        for name, func in self._originals.items():
+            setattr(app, name, func)
+        self._originals.clear()
+
+# Function to check that cached answers match freshly computed ones
+def check_cached_answers(corpus):
+    """
+    Answers every corpus question without the response cache, then twice with it, and
+    reports the questions whose cached answer differs. The corpus has inflected variants
+    ("service"/"services", "laptop"/"laptops") that must not share an answer.
+
+    Args:
+        corpus (list): Dictionaries with 'question'.
+
+    Returns:
+        list: The questions answered differently from the cache.
+    """
+    enabled = app.RESPONSE_CACHE_ENABLED
+    try:
+        app.RESPONSE_CACHE_ENABLED = False
+        expected = [app.respond_to_question(entry['question']) for entry in corpus]
+        app.RESPONSE_CACHE_ENABLED = True
+        app.response_cache.clear()
+        mismatches = []
+        for _ in range(2):
+            for entry, answer in zip(corpus, expected):
+                if app.respond_to_question(entry['question']) != answer and entry['question'] not in mismatches:
+                    mismatches.append(entry['question'])
+        return mismatches
+    finally:
+        app.RESPONSE_CACHE_ENABLED = enabled
+        app.response_cache.clear()
+
+# Function to build the per-target request callable
+def make_caller(target):
+    """
+    Returns a function that answers one question through the given target.
+
+    Args:
+        target (str): 'function' to call respond_to_question, 'flask' to POST to '/' with the test client.
+
+    Returns:
+        callable: Takes a question and returns the answer text or HTML.
+    """
+    if target == 'function':
+        return app.respond_to_question
+
+    local = threading.local()
+    def post(question):
+        # The Flask test client is not shared between threads
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.app.test_client()
+        response = client.post('/', data={'pregunta': question})
+        if response.status_code != 200:
+            raise RuntimeError(f"POST / returned {response.status_code}")
+        return response.get_data(as_text=True)
+    return post
+
+# Function to benchmark one target
+def run_target(target, corpus, iterations=5, concurrency=1, warmup=1):
+    """
+    Sends every corpus question iterations times through the target and measures it.
+
+    Args:
+        target (str): 'function' or 'flask'.
+        corpus (list): Questions from load_corpus().
+        iterations (int): Passes over the corpus.
+        concurrency (int): Number of threads sending questions at once.
+        warmup (int): Untimed passes over the corpus before measuring.
+
+    Returns:
+        dict: Request count, errors, throughput, latency percentiles, per-stage and per-branch breakdowns.
+    """
+    call = make_caller(target)
+    for _ in range(warmup):
+        for entry in corpus:
+            call(entry['question'])
+
+    work = [entry for _ in range(iterations) for entry in corpus]
+    latencies = [0.0] * len(work)
+    failed = [False] * len(work)
+
+    def timed_call(index):
+        start = time.perf_counter()
+        try:
+            call(work[index]['question'])
+        except Exception:
+            failed[index] = True
+        latencies[index] = time.perf_counter() - start
+
+    with StageTimer() as stages:
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed_call, range(len(work))))
+        wall = time.perf_counter() - wall_start
+
+    ordered = sorted(latencies)
+    by_branch = {}
+    for entry, latency in zip(work, latencies):
+        by_branch.setdefault(entry['branch'], []).append(latency)
+
+    return {
+        'requests': len(work),
+        'errors': sum(failed),
+        'wall_seconds': wall,
+        'throughput_rps': len(work) / wall if wall else 0.0,
+        'latency_ms': {
+            'mean': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50': 1000 * percentile(ordered, 0.50),
+            'p95': 1000 * percentile(ordered, 0.95),
+            'p99': 1000 * percentile(ordered, 0.99),
+            'max': 1000 * ordered[-1] if ordered else 0.0,
+        },
+        'stages': {
+            stage: {
+                'calls': stages.calls[stage],
+                'total_ms': 1000 * stages.seconds[stage],
+                'ms_per_request': 1000 * stages.seconds[stage] / len(work) if work else 0.0,
+            }
+            for stage in stages.seconds
+        },
+        'branches_p50_ms': {branch: 1000 * percentile(sorted(values), 0.50) for branch, values in sorted(by_branch.items())},
+    }
+
+# Function to compare a run with a saved baseline
+def compare(results, baseline, max_regression):
+    """
+    Prints the change of each headline metric against a baseline run.
+
+    Args:
+        results (dict): This run's results.
+        baseline (dict): A previous run's results, as saved by this script.
+        max_regression (float): Allowed relative slowdown (0.1 = 10%).
+
+    Returns:
+        list: Descriptions of metrics that regressed by more than max_regression.
+    """
+    regressions = []
+    for target, current in results['targets'].items():
+        previous = baseline.get('targets', {}).get(target)
+        if previous is None:
+            continue
+        print(f"\n{target} vs baseline:")
+        metrics = [('throughput_rps', current['throughput_rps'], previous['throughput_rps'], True)]
+        metrics += [(f"latency {name}", current['latency_ms'][name], previous['latency_ms'][name], False)
+                    for name in ('p50', 'p95', 'p99')]
+        for name, now, before, higher_is_better in metrics:
+            change = (now - before) / before if before else 0.0
+            print(f"  {name}: {before:.3f} -> {now:.3f} ({change:+.1%})")
+            worse = -change if higher_is_better else change
+            if worse > max_regression:
+                regressions.append(f"{target} {name} {change:+.1%}")
+    return regressions
+
+# Function to print a summary of a run
+def print_summary(results):
+    """
+    Prints throughput, latency percentiles and the stage breakdown of each target.
+
+    Args:
+        results (dict): Results from main().
+    """
+    for target, result in results['targets'].items():
+        latency = result['latency_ms']
+        print(f"\n{target}: {result['requests']} requests, {result['errors']} errors, "
+              f"{result['throughput_rps']:.1f} req/s")
+        print(f"  latency ms: p50={latency['p50']:.3f} p95={latency['p95']:.3f} p99={latency['p99']:.3f} max={latency['max']:.3f}")
+        print("  stages (ms per request):")
+        for stage, timing in result['stages'].items():
+            print(f"    {stage}: {timing['ms_per_request']:.3f} ({timing['calls']} calls)")
+
+# Function to run the benchmark from the command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark respond_to_question and the Flask '/' route.")
+    parser.add_argument('--target', choices=['function', 'flask', 'both'], default='both')
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="JSON-lines question corpus.")
+    parser.add_argument('--iterations', type=int, default=5, help="Passes over the corpus.")
+    parser.add_argument('--concurrency', type=int, default=1, help="Threads sending questions at once.")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed passes over the corpus first.")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the response and catalog caches.")
+    parser.add_argument('--check-cache', action='store_true',
+                        help="Only check that cached answers match uncached ones; exit with status 1 if not.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--baseline', help="Compare with results saved by an earlier run.")
+    parser.add_argument('--max-regression', type=float, default=0.10,
+                        help="Exit with status 1 if a metric is this much worse than the baseline (0.1 = 10%%).")
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        app.RESPONSE_CACHE_ENABLED = False
+        app.catalog_cache.maxsize = 0
+
+    corpus = load_corpus(args.corpus)
+    if args.check_cache:
+        mismatches = check_cached_answers(corpus)
+        for question in mismatches:
+            print(f"Cached answer differs: {question}")
+        print(f"{len(corpus) - len(mismatches)} of {len(corpus)} questions answered the same from the cache")
+        return 1 if mismatches else 0
+
+    targets = ['function', 'flask'] if args.target == 'both' else [args.target]
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'pipeline': app.PIPELINE_MODE,
+            'cache': not args.no_cache,
+            'corpus_size': len(corpus),
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+        },
+        'targets': {},
+    }
+    for target in targets:
+        app.response_cache.clear()
+        app.catalog_cache.clear()
+        results['targets'][target] = run_target(target, corpus, args.iterations, args.concurrency, args.warmup)
+
+    print_summary(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,51 +1,245 @@
-# Initialize natural language processing with NLTK
-import nltk
-from nltk.stem import WordNetLemmatizer
+# Answer questions from the command line with the full app.py pipeline: one question
+# interactively, or whole archives of questions in bulk across a pool of worker processes
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
 
-# Download necessary NLTK models for tokenizing and lemmatizing text
-nltk.download('punkt')
-nltk.download('wordnet')
+# Lines sent to a worker at a time; each chunk goes through spaCy with one nlp.pipe call
+CHUNK_SIZE = 256
 
-# Define a function to process text, tokenizing and lemmatizing words
-def process_text(text):
+# Lines answered between two checkpoints
+CHECKPOINT_EVERY = 10000
+
+# Set in each worker process by init_worker(); the models are loaded once per worker
+_app = None
+
+# Function run once in each worker process
+def init_worker():
+    """
+    Loads app.py, and with it the spaCy and NLTK models, in a worker process.
     """
-    Processes the given text by tokenizing and lemmatizing words to normalize them.
-    
+    global _app
+    # One INFO line per question would dominate a bulk run; set CHATBOT_LOG_LEVEL=INFO to keep them
+    os.environ.setdefault('CHATBOT_LOG_LEVEL', 'WARNING')
+    import app
+    _app = app
+
+# Function to read a question from an input line
+def parse_line(line):
+    """
+    Reads one input line: a JSON object with a 'question' field, or a plain-text question.
+
     Args:
-        text (str): The text to be processed.
-    
+        line (str): The line, without its line break.
+
     Returns:
-        list: List of processed words.
+        dict: The record to answer, with at least 'question'.
+
+    Raises:
+        ValueError: If the line is JSON but has no string 'question'.
     """
-    lemmatizer = WordNetLemmatizer()
-    tokens = nltk.word_tokenize(text)
-    # Apply lemmatization to reduce words to their base form
-    tokens = [lemmatizer.lemmatize(token.lower()) for token in tokens]
-    return tokens
+    if line.startswith('{'):
+        record = json.loads(line)
+        if not isinstance(record.get('question'), str):
+            raise ValueError("missing 'question'")
+        return record
+    return {'question': line}
 
-# Implement a function to respond to user queries
-def respond_to_question(question):
+# Function run in the workers to answer a chunk of lines
+def answer_chunk(chunk):
     """
-    Responds to a user query based on a set of predefined responses.
-    
+    Answers a chunk of input lines with app.respond_to_questions.
+
     Args:
-        question (str): The user's question.
-    
+        chunk (list): (line number, raw line bytes) tuples.
+
     Returns:
-        str: The corresponding response.
+        bytes: One JSON line per input line, in input order.
+    """
+    if _app is None:
+        init_worker()
+    records = []
+    for line_number, raw in chunk:
+        try:
+            record = parse_line(raw.decode('utf-8').rstrip('\r\n'))
+        except ValueError as e:
+            # json.JSONDecodeError and UnicodeDecodeError are ValueErrors too
+            record = {'error': str(e)}
+        record['line'] = line_number
+        records.append(record)
+
+    pending = [record for record in records if 'error' not in record]
+    answers = _app.respond_to_questions([record['question'] for record in pending])
+    for record, answer in zip(pending, answers):
+        record['answer'] = answer
+    return b''.join(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n' for record in records)
+
+# Function to split the input into chunks while tracking the byte offset reached
+def read_chunks(stream, first_line, chunk_size):
+    """
+    Yields chunks of non-empty lines with the input offset after each chunk.
+
+    Args:
+        stream (file): Binary input stream.
+        first_line (int): Line number of the first line read.
+        chunk_size (int): Lines per chunk.
+
+    Yields:
+        tuple: (list of (line number, raw line) tuples, bytes consumed so far, lines consumed so far).
+    """
+    chunk = []
+    consumed = 0
+    line_number = first_line
+    for raw in stream:
+        consumed += len(raw)
+        line_number += 1
+        if raw.strip():
+            chunk.append((line_number, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk, consumed, line_number
+            chunk = []
+    if chunk or consumed:
+        yield chunk, consumed, line_number
+
+# Function to save the progress of a run
+def write_checkpoint(path, state):
+    """
+    Writes the checkpoint atomically, so a crash never leaves a half-written file.
+
+    Args:
+        path (str): Checkpoint file.
+        state (dict): Input offset, lines done and output size.
     """
-    if "hours" in question.lower():
-        # If the question includes the word "hours", respond with business hours
-        return "Our business hours are Monday to Friday, 9am to 5pm."
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+# Function to answer every question of an input stream
+def answer_file(input_path='-', output_path='-', workers=os.cpu_count() or 1, chunk_size=CHUNK_SIZE,
+                checkpoint_path=None, checkpoint_every=CHECKPOINT_EVERY, resume=False):
+    """
+    Answers every line of the input and writes one JSON line per answer, in input order.
+
+    Chunks of lines are answered by a pool of worker processes. At most two chunks per
+    worker are in flight, so memory use does not depend on the size of the input.
+
+    Args:
+        input_path (str): JSON-lines or plain-text file of questions; '-' for stdin.
+        output_path (str): File for the answers; '-' for stdout.
+        workers (int): Worker processes; 0 answers in this process.
+        chunk_size (int): Lines sent to a worker at a time.
+        checkpoint_path (str): File recording progress; None disables checkpoints.
+        checkpoint_every (int): Lines between checkpoints.
+        resume (bool): Continue from the checkpoint instead of starting over.
+
+    Returns:
+        int: Number of lines answered in this run.
+    """
+    state = {'input_offset': 0, 'lines': 0, 'output_size': 0}
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding='utf-8') as f:
+            state = json.load(f)
+
+    source = sys.stdin.buffer if input_path == '-' else open(input_path, 'rb')
+    if output_path == '-':
+        sink = sys.stdout.buffer
     else:
-        # If the question is not recognized, return a generic message
-        return "I'm sorry, I don't understand your question."
+        if state['output_size'] and os.path.getsize(output_path) < state['output_size']:
+            raise ValueError(f"{output_path} is shorter than its checkpoint says; start over without --resume")
+        sink = open(output_path, 'r+b' if state['output_size'] else 'wb')
+        # Drop anything written after the last checkpoint; it is answered again
+        sink.truncate(state['output_size'])
+        sink.seek(state['output_size'])
+    if state['input_offset']:
+        source.seek(state['input_offset'])
 
-# Example usage
-if __name__ == "__main__":
+    if workers:
+        # The workers inherit the environment; each writes its own log file unless told otherwise,
+        # since several processes cannot rotate one file ('{pid}' is replaced by the process id)
+        os.environ.setdefault('CHATBOT_LOG_FILE', 'chatbot-{pid}.log')
+    pool = multiprocessing.Pool(workers, initializer=init_worker) if workers else None
+    in_flight = deque()
+    answered = 0
+    next_checkpoint = state['lines'] + checkpoint_every
+    started = time.monotonic()
+
+    def write_oldest():
+        nonlocal answered, next_checkpoint
+        result, offset, lines, count = in_flight.popleft()
+        sink.write(result.get() if pool else result)
+        answered += count
+        if checkpoint_path and lines >= next_checkpoint:
+            sink.flush()
+            os.fsync(sink.fileno())
+            write_checkpoint(checkpoint_path, {'input_offset': state['input_offset'] + offset, 'lines': lines,
+                                               'output_size': sink.tell()})
+            next_checkpoint = lines + checkpoint_every
+            rate = answered / (time.monotonic() - started)
+            print(f"{lines} lines done ({rate:.0f} lines/s)", file=sys.stderr)
+
+    try:
+        for chunk, offset, lines in read_chunks(source, state['lines'], chunk_size):
+            result = pool.apply_async(answer_chunk, (chunk,)) if pool else answer_chunk(chunk)
+            in_flight.append((result, offset, lines, len(chunk)))
+            # Keep every worker busy without reading ahead of the output
+            if len(in_flight) >= 2 * max(workers, 1):
+                write_oldest()
+        while in_flight:
+            write_oldest()
+        sink.flush()
+    finally:
+        if pool:
+            pool.terminate()
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+
+    # The run is complete; a later run should start over
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return answered
+
+# Function to answer one question typed by the user
+def ask():
+    """
+    Prompts for a question and prints the chatbot's answer.
+    """
+    init_worker()
     # Prompt the user to enter a question
     user_question = input("Ask me a question: ")
-    # Get the corresponding response
-    response = respond_to_question(user_question)
-    # Display the response to the user
-    print(response)
+    # Display the corresponding response to the user
+    print(_app.respond_to_question(user_question))
+
+# Run the command-line interface
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer questions with the chatbot, one interactively or many in bulk.")
+    parser.add_argument('--input', help="JSON-lines or plain-text file of questions; '-' for stdin. "
+                                        "Without it, asks for one question interactively (or reads stdin when it is not a terminal).")
+    parser.add_argument('--output', default='-', help="File for the JSON-lines answers; '-' for stdout.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes; 0 answers in this process.")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Lines sent to a worker at a time.")
+    parser.add_argument('--checkpoint', help="Progress file (default: the output file name plus .checkpoint).")
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY, help="Lines between checkpoints.")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted run from its checkpoint.")
+    args = parser.parse_args()
+
+    if args.input is None and sys.stdin.isatty():
+        ask()
+        sys.exit(0)
+
+    input_path = args.input or '-'
+    checkpoint_path = args.checkpoint or (args.output + '.checkpoint' if args.output != '-' else None)
+    if checkpoint_path and (input_path == '-' or args.output == '-'):
+        parser.error("checkpoints need both --input and --output to be files")
+
+    answered = answer_file(input_path, args.output, args.workers, args.chunk_size, checkpoint_path,
+                           args.checkpoint_every, args.resume)
+    print(f"Answered {answered} lines", file=sys.stderr)
@@ -1,13 +1,150 @@
+import argparse
 import sqlite3
+import sys
 
-# Connect to the database
-conn = sqlite3.connect('electronics_store.db')
-cursor = conn.cursor()
+from database import DB_PATH, QUERIES
 
-# List all tables in the database
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-tables = cursor.fetchall()
+# Queries on the chatbot's hot path; the audit fails if any of them scans a table.
+# The other queries are expected to scan: the LIKE fallbacks, used before the
+# database is migrated or for names shorter than three characters.
+HOT_QUERIES = ['product_search', 'employee_search', 'product_page', 'orders_page_search',
+               'customer_spending_search', 'best_sellers', 'product_rating_search']
 
-print("Tables in the database:", tables)
+# Sample value bound to each parameter when explaining a query
+SAMPLE_PARAMS = {
+    'search': '"smith"',
+    'like': '%smith%',
+}
 
-conn.close()
+# Sample parameters for queries that take more than a search term (the keyset page queries)
+QUERY_PARAMS = {
+    'product_page': (0, 20),
+    'orders_page_search': ('"smith"', 0, 20),
+    'orders_page_like': ('%smith%', 0, 20),
+    'best_sellers': (5,),
+}
+
+# Function to get the query plan of a statement
+def explain(cursor, sql, params=None):
+    """
+    Runs EXPLAIN QUERY PLAN on a statement with sample parameters.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the database.
+        sql (str): The statement.
+        params (tuple): Parameters to bind; by default every parameter gets a sample search term.
+
+    Returns:
+        list: The plan's detail lines.
+    """
+    if params is None:
+        sample = SAMPLE_PARAMS['search'] if 'MATCH' in sql else SAMPLE_PARAMS['like']
+        params = (sample,) * sql.count('?')
+    return [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+# Function to find the plan steps that read a whole table
+def find_scans(plan):
+    """
+    Returns the plan steps that scan a table or build an automatic index.
+
+    Full-text MATCH lookups show up as 'SCAN ... VIRTUAL TABLE' but are index
+    lookups, so they are not counted.
+
+    Args:
+        plan (list): Plan detail lines from explain().
+
+    Returns:
+        list: The offending lines.
+    """
+    return [detail for detail in plan
+            if (detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail) or 'AUTOMATIC' in detail]
+
+# Function to measure the space used by each table and index
+def object_sizes(cursor):
+    """
+    Returns the size of every table and index, using the dbstat virtual table when SQLite has it.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the database.
+
+    Returns:
+        list: (type, name, table, bytes or None, rows or None) tuples.
+    """
+    objects = cursor.execute(
+        "SELECT type, name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index') ORDER BY tbl_name, type DESC, name"
+    ).fetchall()
+    try:
+        sizes = dict(cursor.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except sqlite3.OperationalError:
+        sizes = {}
+    result = []
+    for kind, name, table in objects:
+        rows = None
+        if kind == 'table' and not name.startswith('sqlite_'):
+            try:
+                rows = cursor.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            except sqlite3.OperationalError:
+                pass
+        result.append((kind, name, table, sizes.get(name), rows))
+    return result
+
+# Function to run the full audit
+def audit(path=DB_PATH):
+    """
+    Prints table and index sizes and the query plan of every chatbot query.
+
+    Args:
+        path (str): Path to the database file.
+
+    Returns:
+        list: Names of hot queries that scan a table; empty if the audit passes.
+    """
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+
+    print("Tables and indexes:")
+    for kind, name, table, size, rows in object_sizes(cursor):
+        size_text = f"{size / 1024:.1f} KB" if size is not None else "size unknown"
+        rows_text = f", {rows} rows" if rows is not None else ""
+        label = name if kind == 'table' else f"  index {name}"
+        print(f"  {label}: {size_text}{rows_text}")
+
+    print()
+    print("Query plans:")
+    regressions = []
+    for name, sql in QUERIES.items():
+        hot = name in HOT_QUERIES
+        try:
+            plan = explain(cursor, sql, QUERY_PARAMS.get(name))
+        except sqlite3.OperationalError as e:
+            # For example, the search tables are missing because the database was never migrated
+            print(f"  {name}: cannot explain ({e})")
+            if hot:
+                regressions.append(name)
+            continue
+        scans = find_scans(plan)
+        if scans and hot:
+            status = "FAIL: full scan on hot path"
+            regressions.append(name)
+        elif scans:
+            status = "scan (expected)"
+        else:
+            status = "ok"
+        print(f"  {name}{' [hot]' if hot else ''}: {status}")
+        for detail in plan:
+            print(f"      {detail}")
+
+    conn.close()
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Audit the chatbot database: sizes and query plans.")
+    parser.add_argument('--db', default=DB_PATH, help="Path to the database file.")
+    args = parser.parse_args()
+
+    regressions = audit(args.db)
+    print()
+    if regressions:
+        print(f"Hot queries scanning a table: {', '.join(regressions)}")
+        sys.exit(1)
+    print("All hot queries use indexes.")
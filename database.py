@@ -1,172 +1,745 @@
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import random
 import sqlite3
+from datetime import date, timedelta
 
-# Create a connection to the database
-conn = sqlite3.connect('electronics_store.db')
-cursor = conn.cursor()
-
-# Create the categories table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS categories
-(id INTEGER PRIMARY KEY, name TEXT)
-''')
-
-# Create the suppliers table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS suppliers
-(id INTEGER PRIMARY KEY, name TEXT, contact_email TEXT)
-''')
-
-# Create the products table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS products
-(id INTEGER PRIMARY KEY, name TEXT, description TEXT, price REAL, stock_quantity INTEGER, category_id INTEGER,
-FOREIGN KEY (category_id) REFERENCES categories (id))
-''')
-
-# Create the product_suppliers table (many-to-many relationship)
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS product_suppliers
-(product_id INTEGER, supplier_id INTEGER,
-FOREIGN KEY (product_id) REFERENCES products (id),
-FOREIGN KEY (supplier_id) REFERENCES suppliers (id))
-''')
-
-# Create the customers table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS customers
-(id INTEGER PRIMARY KEY, name TEXT, email TEXT, phone TEXT)
-''')
-
-# Create the orders table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS orders
-(id INTEGER PRIMARY KEY, customer_id INTEGER, order_date DATE, total REAL,
-FOREIGN KEY (customer_id) REFERENCES customers (id))
-''')
-
-# Create the order_items table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS order_items
-(id INTEGER PRIMARY KEY, order_id INTEGER, product_id INTEGER, quantity INTEGER,
-FOREIGN KEY (order_id) REFERENCES orders (id),
-FOREIGN KEY (product_id) REFERENCES products (id))
-''')
-
-# Create the product_reviews table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS product_reviews
-(id INTEGER PRIMARY KEY, product_id INTEGER, customer_id INTEGER, review TEXT, rating INTEGER,
-FOREIGN KEY (product_id) REFERENCES products (id),
-FOREIGN KEY (customer_id) REFERENCES customers (id))
-''')
-
-# Create the employees table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS employees
-(id INTEGER PRIMARY KEY, name TEXT, position TEXT, email TEXT)
-''')
-
-# Create the employee_roles table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS employee_roles
-(id INTEGER PRIMARY KEY, role_name TEXT)
-''')
-
-# Create the employee_role_assignments table (many-to-many relationship)
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS employee_role_assignments
-(employee_id INTEGER, role_id INTEGER,
-FOREIGN KEY (employee_id) REFERENCES employees (id),
-FOREIGN KEY (role_id) REFERENCES employee_roles (id))
-''')
-
-# Insert some example data
-
-# Categories
-cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Electronics')")
-cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Accessories')")
-cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Gaming')")
-cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Home Appliances')")
-
-# Suppliers
-cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier A', 'supplierA@example.com')")
-cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier B', 'supplierB@example.com')")
-cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier C', 'supplierC@example.com')")
-cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier D', 'supplierD@example.com')")
-
-# Products
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Smartphone X', 'High-end smartphone with advanced camera', 999.99, 100, 1)")
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Laptop Y', 'Powerful laptop for gaming and video editing', 1999.99, 50, 1)")
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Smartwatch Z', 'Advanced smartwatch with fitness tracking', 299.99, 50, 2)")
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Gaming Mouse', 'High-precision gaming mouse', 99.99, 200, 3)")
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Wireless Headphones', 'Premium wireless headphones with long battery life', 149.99, 150, 2)")
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Refrigerator', 'Energy-efficient refrigerator with advanced features', 999.99, 20, 4)")
-cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Washing Machine', 'High-capacity washing machine with multiple cycles', 499.99, 30, 4)")
-
-# Product Suppliers
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (1, 1)")
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (2, 2)")
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (3, 1)")
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (4, 3)")
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (5, 2)")
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (6, 4)")
-cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (7, 3)")
-
-# Customers
-cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('John Doe', 'john@example.com', '123-456-7890')")
-cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('Jane Smith', 'jane.smith@example.com', '987-654-3210')")
-cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('Michael Brown', 'michael.brown@example.com', '555-123-4567')")
-cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('Emily Johnson', 'emily.johnson@example.com', '111-222-3333')")
-cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('David Lee', 'david.lee@example.com', '444-555-6666')")
-
-# Orders
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (1, '2025-03-01', 999.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (2, '2025-03-15', 299.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (3, '2025-03-20', 99.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (4, '2025-03-25', 149.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (5, '2025-03-30', 499.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (1, '2025-04-01', 1999.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (2, '2025-04-05', 99.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (3, '2025-04-10', 149.99)")
-cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (4, '2025-04-15', 299.99)")
-
-# Order items
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (1, 1, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (2, 3, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (3, 4, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (4, 5, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (5, 6, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (6, 2, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (7, 4, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (8, 5, 1)")
-cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (9, 3, 1)")
-
-# Product Reviews
-cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (1, 1, 'Excellent product!', 5)")
-cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (3, 2, 'Good but not great.', 3)")
-cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (4, 3, 'Perfect for gaming!', 5)")
-cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (5, 4, 'Comfortable headphones.', 4)")
-cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (6, 5, 'Great refrigerator!', 5)")
-
-# Employees
-cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('Jane Smith', 'Sales Manager', 'jane.smith@example.com')")
-cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('John Doe', 'Support Specialist', 'john.doe@example.com')")
-cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('Emily Johnson', 'Marketing Manager', 'emily.johnson@example.com')")
-cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('Michael Brown', 'Sales Representative', 'michael.brown@example.com')")
-
-# Employee Roles
-cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Sales Manager')")
-cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Support Specialist')")
-cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Marketing Manager')")
-cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Sales Representative')")
-
-# Employee Role Assignments
-cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (1, 1)")
-cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (2, 2)")
-cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (3, 3)")
-cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (4, 4)")
-
-# Commit changes
-conn.commit()
-
-# Close
+# Default location of the store database
+DB_PATH = 'electronics_store.db'
+
+# Full-text search indexes: base table -> (FTS5 table, indexed columns).
+# They use the trigram tokenizer so MATCH behaves like the substring LIKE
+# lookups it replaces, but is answered from an index instead of a table scan.
+SEARCH_INDEXES = {
+    'products': ('products_fts', ['name', 'description']),
+    'employees': ('employees_fts', ['name', 'position']),
+    'customers': ('customers_fts', ['name']),
+}
+
+# Secondary indexes: (index name, table, columns). Foreign keys are indexed so joins
+# search instead of scanning; the orders index also covers every column the order
+# lookup reads, so it never has to visit the orders table itself.
+INDEXES = [
+    ('idx_orders_customer', 'orders', ['customer_id', 'id', 'order_date', 'total']),
+    ('idx_order_items_order', 'order_items', ['order_id', 'product_id', 'quantity']),
+    ('idx_order_items_product', 'order_items', ['product_id', 'quantity']),
+    ('idx_product_suppliers_product', 'product_suppliers', ['product_id', 'supplier_id']),
+    ('idx_product_suppliers_supplier', 'product_suppliers', ['supplier_id', 'product_id']),
+    ('idx_product_reviews_product', 'product_reviews', ['product_id', 'rating']),
+    ('idx_product_reviews_customer', 'product_reviews', ['customer_id']),
+    ('idx_products_category', 'products', ['category_id']),
+    ('idx_employee_role_assignments_employee', 'employee_role_assignments', ['employee_id', 'role_id']),
+    ('idx_employee_role_assignments_role', 'employee_role_assignments', ['role_id', 'employee_id']),
+    # Best sellers are read from the top of this index
+    ('idx_product_sales_units', 'product_sales', ['units_sold', 'product_id']),
+]
+
+# Summary tables kept up to date by triggers, so aggregate questions are a primary-key
+# lookup instead of a scan of orders, order_items or product_reviews:
+# summary table -> (source table, key column, {summary column: amount each source row adds})
+SUMMARY_TABLES = {
+    'customer_order_totals': ('orders', 'customer_id', {'order_count': '1', 'total_spent': 'COALESCE({row}.total, 0)'}),
+    'product_sales': ('order_items', 'product_id', {'units_sold': 'COALESCE({row}.quantity, 0)'}),
+    'product_rating_totals': ('product_reviews', 'product_id',
+                              {'rating_count': '({row}.rating IS NOT NULL)', 'rating_sum': 'COALESCE({row}.rating, 0)'}),
+}
+
+# Source columns each summary depends on; updates to other columns leave the summaries alone
+SUMMARY_SOURCE_COLUMNS = {
+    'customer_order_totals': ['customer_id', 'total'],
+    'product_sales': ['product_id', 'quantity'],
+    'product_rating_totals': ['product_id', 'rating'],
+}
+
+# SQL issued by the chatbot's lookup helpers in app.py, kept here so check_tables.py can audit their query plans
+QUERIES = {
+    'product_search': "SELECT p.name, p.description, p.price, p.stock_quantity FROM products_fts JOIN products p ON p.id = products_fts.rowid WHERE products_fts MATCH ? ORDER BY bm25(products_fts, 10.0, 1.0) LIMIT 1",
+    'product_like': "SELECT name, description, price, stock_quantity FROM products WHERE name LIKE ?",
+    # Keyset pages: the rows after the last id seen, so each page is an index seek however deep it is
+    'product_page': "SELECT id, name FROM products WHERE id > ? ORDER BY id LIMIT ?",
+    'employee_search': "SELECT e.name, e.position, e.email FROM employees_fts JOIN employees e ON e.id = employees_fts.rowid WHERE employees_fts MATCH ? ORDER BY bm25(employees_fts, 10.0, 1.0) LIMIT 1",
+    'employee_like': "SELECT name, position, email FROM employees WHERE name LIKE ?",
+    # CROSS JOIN keeps the matching customers as the outer loop; otherwise SQLite may walk
+    # every order by id and probe the customer for each one
+    'orders_page_search': "SELECT c.name, o.id, o.order_date, o.total FROM customers_fts CROSS JOIN customers c ON c.id = customers_fts.rowid CROSS JOIN orders o ON c.id = o.customer_id WHERE customers_fts MATCH ? AND o.id > ? ORDER BY o.id LIMIT ?",
+    'orders_page_like': "SELECT c.name, o.id, o.order_date, o.total FROM customers c CROSS JOIN orders o ON c.id = o.customer_id WHERE c.name LIKE ? AND o.id > ? ORDER BY o.id LIMIT ?",
+    # Aggregates read from the summary tables: one primary-key lookup per matched name
+    'customer_spending_search': "SELECT c.name, s.order_count, s.total_spent FROM customers_fts JOIN customers c ON c.id = customers_fts.rowid LEFT JOIN customer_order_totals s ON s.customer_id = c.id WHERE customers_fts MATCH ? ORDER BY customers_fts.rank LIMIT 1",
+    'customer_spending_like': "SELECT c.name, s.order_count, s.total_spent FROM customers c LEFT JOIN customer_order_totals s ON s.customer_id = c.id WHERE c.name LIKE ? LIMIT 1",
+    'best_sellers': "SELECT p.name, s.units_sold FROM product_sales s JOIN products p ON p.id = s.product_id WHERE s.units_sold > 0 ORDER BY s.units_sold DESC LIMIT ?",
+    'product_rating_search': "SELECT p.name, r.rating_count, r.rating_sum FROM products_fts JOIN products p ON p.id = products_fts.rowid LEFT JOIN product_rating_totals r ON r.product_id = p.id WHERE products_fts MATCH ? ORDER BY bm25(products_fts, 10.0, 1.0) LIMIT 1",
+    'product_rating_like': "SELECT p.name, r.rating_count, r.rating_sum FROM products p LEFT JOIN product_rating_totals r ON r.product_id = p.id WHERE p.name LIKE ? LIMIT 1",
+}
+
+# Create all the store tables
+def create_schema(cursor):
+    """
+    Creates the store tables if they do not exist yet.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+    """
+    # Create the categories table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS categories
+    (id INTEGER PRIMARY KEY, name TEXT)
+    ''')
+
+    # Create the suppliers table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS suppliers
+    (id INTEGER PRIMARY KEY, name TEXT, contact_email TEXT)
+    ''')
+
+    # Create the products table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS products
+    (id INTEGER PRIMARY KEY, name TEXT, description TEXT, price REAL, stock_quantity INTEGER, category_id INTEGER,
+    FOREIGN KEY (category_id) REFERENCES categories (id))
+    ''')
+
+    # Create the product_suppliers table (many-to-many relationship)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS product_suppliers
+    (product_id INTEGER, supplier_id INTEGER,
+    FOREIGN KEY (product_id) REFERENCES products (id),
+    FOREIGN KEY (supplier_id) REFERENCES suppliers (id))
+    ''')
+
+    # Create the customers table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS customers
+    (id INTEGER PRIMARY KEY, name TEXT, email TEXT, phone TEXT)
+    ''')
+
+    # Create the orders table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS orders
+    (id INTEGER PRIMARY KEY, customer_id INTEGER, order_date DATE, total REAL,
+    FOREIGN KEY (customer_id) REFERENCES customers (id))
+    ''')
+
+    # Create the order_items table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS order_items
+    (id INTEGER PRIMARY KEY, order_id INTEGER, product_id INTEGER, quantity INTEGER,
+    FOREIGN KEY (order_id) REFERENCES orders (id),
+    FOREIGN KEY (product_id) REFERENCES products (id))
+    ''')
+
+    # Create the product_reviews table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS product_reviews
+    (id INTEGER PRIMARY KEY, product_id INTEGER, customer_id INTEGER, review TEXT, rating INTEGER,
+    FOREIGN KEY (product_id) REFERENCES products (id),
+    FOREIGN KEY (customer_id) REFERENCES customers (id))
+    ''')
+
+    # Create the employees table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS employees
+    (id INTEGER PRIMARY KEY, name TEXT, position TEXT, email TEXT)
+    ''')
+
+    # Create the employee_roles table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS employee_roles
+    (id INTEGER PRIMARY KEY, role_name TEXT)
+    ''')
+
+    # Create the employee_role_assignments table (many-to-many relationship)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS employee_role_assignments
+    (employee_id INTEGER, role_id INTEGER,
+    FOREIGN KEY (employee_id) REFERENCES employees (id),
+    FOREIGN KEY (role_id) REFERENCES employee_roles (id))
+    ''')
+
+    # Create the summary tables (filled by create_summaries)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS customer_order_totals
+    (customer_id INTEGER PRIMARY KEY, order_count INTEGER NOT NULL, total_spent REAL NOT NULL)
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS product_sales
+    (product_id INTEGER PRIMARY KEY, units_sold INTEGER NOT NULL)
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS product_rating_totals
+    (product_id INTEGER PRIMARY KEY, rating_count INTEGER NOT NULL, rating_sum INTEGER NOT NULL)
+    ''')
+
+# Create the full-text search tables and the triggers that keep them in sync
+def create_search_indexes(cursor):
+    """
+    Creates the FTS5 search tables and their sync triggers, then rebuilds them
+    from the base tables. Safe to run on an existing database.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+    """
+    for table, (fts_table, columns) in SEARCH_INDEXES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        
+        # External-content table: the text lives only in the base table
+        cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table}
+        USING fts5({column_list}, content='{table}', content_rowid='id', tokenize='trigram')
+        """)
+        
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+        """)
+        
+        # Index any rows that were there before the triggers existed
+        cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+# Recompute the summary tables from the base tables
+def rebuild_summaries(cursor):
+    """
+    Refills every summary table from its source table, correcting any drift
+    (for instance after rows were changed while the triggers were dropped).
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+    
+    Returns:
+        dict: Number of rows in each summary table after the rebuild.
+    """
+    counts = {}
+    for summary, (source, key, amounts) in SUMMARY_TABLES.items():
+        columns = ', '.join(amounts)
+        totals = ', '.join(f"SUM({amount.format(row=source)})" for amount in amounts.values())
+        cursor.execute(f"DELETE FROM {summary}")
+        cursor.execute(f"""
+        INSERT INTO {summary} ({key}, {columns})
+        SELECT {key}, {totals} FROM {source} WHERE {key} IS NOT NULL GROUP BY {key}
+        """)
+        counts[summary] = cursor.execute(f"SELECT COUNT(*) FROM {summary}").fetchone()[0]
+    return counts
+
+# Create the triggers that keep the summary tables in sync
+def create_summaries(cursor):
+    """
+    Creates the triggers that maintain the summary tables and fills the tables from
+    the rows already there. Safe to run on an existing database.
+    
+    Each insert into a source table adds its amounts to the row of its key, each delete
+    subtracts them, and an update does both, so the summaries cost a primary-key write
+    per changed row instead of an aggregate scan per question.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+    
+    Returns:
+        dict: Number of rows in each summary table.
+    """
+    for summary, (source, key, amounts) in SUMMARY_TABLES.items():
+        columns = ', '.join(amounts)
+        new_amounts = ', '.join(amount.format(row='new') for amount in amounts.values())
+        additions = ', '.join(f"{column} = {column} + excluded.{column}" for column in amounts)
+        subtractions = ', '.join(f"{column} = {column} - {amount.format(row='old')}" for column, amount in amounts.items())
+        # The WHERE clause skips rows without a key; it is also required before ON CONFLICT in INSERT ... SELECT
+        add_new = f"""INSERT INTO {summary} ({key}, {columns}) SELECT new.{key}, {new_amounts} WHERE new.{key} IS NOT NULL
+            ON CONFLICT ({key}) DO UPDATE SET {additions};"""
+        subtract_old = f"UPDATE {summary} SET {subtractions} WHERE {key} = old.{key};"
+        
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {summary}_ai AFTER INSERT ON {source} BEGIN
+            {add_new}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {summary}_ad AFTER DELETE ON {source} BEGIN
+            {subtract_old}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {summary}_au AFTER UPDATE OF {', '.join(SUMMARY_SOURCE_COLUMNS[summary])} ON {source} BEGIN
+            {subtract_old}
+            {add_new}
+        END
+        """)
+    
+    # Count the rows that were there before the triggers existed
+    return rebuild_summaries(cursor)
+
+# Create the secondary indexes
+def create_indexes(cursor):
+    """
+    Creates the secondary indexes if they do not exist yet.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+    """
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+# Insert the demo data
+def insert_example_data(cursor):
+    """
+    Inserts the example store data.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+    """
+    # Insert some example data
+
+    # Categories
+    cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Electronics')")
+    cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Accessories')")
+    cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Gaming')")
+    cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('Home Appliances')")
+
+    # Suppliers
+    cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier A', 'supplierA@example.com')")
+    cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier B', 'supplierB@example.com')")
+    cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier C', 'supplierC@example.com')")
+    cursor.execute("INSERT OR IGNORE INTO suppliers (name, contact_email) VALUES ('Supplier D', 'supplierD@example.com')")
+
+    # Products
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Smartphone X', 'High-end smartphone with advanced camera', 999.99, 100, 1)")
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Laptop Y', 'Powerful laptop for gaming and video editing', 1999.99, 50, 1)")
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Smartwatch Z', 'Advanced smartwatch with fitness tracking', 299.99, 50, 2)")
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Gaming Mouse', 'High-precision gaming mouse', 99.99, 200, 3)")
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Wireless Headphones', 'Premium wireless headphones with long battery life', 149.99, 150, 2)")
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Refrigerator', 'Energy-efficient refrigerator with advanced features', 999.99, 20, 4)")
+    cursor.execute("INSERT OR IGNORE INTO products (name, description, price, stock_quantity, category_id) VALUES ('Washing Machine', 'High-capacity washing machine with multiple cycles', 499.99, 30, 4)")
+
+    # Product Suppliers
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (1, 1)")
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (2, 2)")
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (3, 1)")
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (4, 3)")
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (5, 2)")
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (6, 4)")
+    cursor.execute("INSERT OR IGNORE INTO product_suppliers (product_id, supplier_id) VALUES (7, 3)")
+
+    # Customers
+    cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('John Doe', 'john@example.com', '123-456-7890')")
+    cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('Jane Smith', 'jane.smith@example.com', '987-654-3210')")
+    cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('Michael Brown', 'michael.brown@example.com', '555-123-4567')")
+    cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('Emily Johnson', 'emily.johnson@example.com', '111-222-3333')")
+    cursor.execute("INSERT OR IGNORE INTO customers (name, email, phone) VALUES ('David Lee', 'david.lee@example.com', '444-555-6666')")
+
+    # Orders
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (1, '2025-03-01', 999.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (2, '2025-03-15', 299.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (3, '2025-03-20', 99.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (4, '2025-03-25', 149.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (5, '2025-03-30', 499.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (1, '2025-04-01', 1999.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (2, '2025-04-05', 99.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (3, '2025-04-10', 149.99)")
+    cursor.execute("INSERT OR IGNORE INTO orders (customer_id, order_date, total) VALUES (4, '2025-04-15', 299.99)")
+
+    # Order items
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (1, 1, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (2, 3, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (3, 4, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (4, 5, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (5, 6, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (6, 2, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (7, 4, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (8, 5, 1)")
+    cursor.execute("INSERT OR IGNORE INTO order_items (order_id, product_id, quantity) VALUES (9, 3, 1)")
+
+    # Product Reviews
+    cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (1, 1, 'Excellent product!', 5)")
+    cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (3, 2, 'Good but not great.', 3)")
+    cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (4, 3, 'Perfect for gaming!', 5)")
+    cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (5, 4, 'Comfortable headphones.', 4)")
+    cursor.execute("INSERT OR IGNORE INTO product_reviews (product_id, customer_id, review, rating) VALUES (6, 5, 'Great refrigerator!', 5)")
+
+    # Employees
+    cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('Jane Smith', 'Sales Manager', 'jane.smith@example.com')")
+    cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('John Doe', 'Support Specialist', 'john.doe@example.com')")
+    cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('Emily Johnson', 'Marketing Manager', 'emily.johnson@example.com')")
+    cursor.execute("INSERT OR IGNORE INTO employees (name, position, email) VALUES ('Michael Brown', 'Sales Representative', 'michael.brown@example.com')")
+
+    # Employee Roles
+    cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Sales Manager')")
+    cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Support Specialist')")
+    cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Marketing Manager')")
+    cursor.execute("INSERT OR IGNORE INTO employee_roles (role_name) VALUES ('Sales Representative')")
+
+    # Employee Role Assignments
+    cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (1, 1)")
+    cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (2, 2)")
+    cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (3, 3)")
+    cursor.execute("INSERT OR IGNORE INTO employee_role_assignments (employee_id, role_id) VALUES (4, 4)")
+
+# Bring an existing database up to date without touching its data
+def migrate(path=DB_PATH):
+    """
+    Adds the objects introduced after the original schema (full-text search
+    indexes, summary tables and secondary indexes) to an existing database and
+    switches it to WAL mode, so the chatbot's readers do not wait for writers.
+    
+    Args:
+        path (str): Path to the database file.
+    """
+    conn = sqlite3.connect(path)
+    # journal_mode is stored in the file; the chatbot only opens read-only connections and never sets it
+    conn.execute("PRAGMA journal_mode=WAL")
+    cursor = conn.cursor()
+    create_schema(cursor)
+    create_search_indexes(cursor)
+    create_summaries(cursor)
+    create_indexes(cursor)
+    cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+# Rows sent to SQLite per executemany call during bulk loads
+BULK_BATCH_SIZE = 50000
+
+# Tables that bulk loads and the generator may write to
+BULK_TABLES = ['categories', 'suppliers', 'products', 'product_suppliers', 'customers',
+               'orders', 'order_items', 'product_reviews', 'employees', 'employee_roles',
+               'employee_role_assignments']
+
+# Set up the connection for a fast bulk load and restore everything afterwards
+@contextlib.contextmanager
+def bulk_load_phase(conn):
+    """
+    Prepares a connection for bulk inserts.
+    
+    Durability pragmas are relaxed for the load (a crash mid-load can corrupt the file, so
+    load into a copy if the data matters). Secondary indexes, the full-text sync triggers and
+    the summary triggers are dropped, so rows are not indexed or counted one by one. When the
+    block ends, the indexes are rebuilt in one pass, the full-text and summary tables are
+    rebuilt, ANALYZE refreshes the planner statistics and the pragmas, including the
+    journal mode, are set back to what they were.
+    
+    Args:
+        conn (sqlite3.Connection): Connection to the target database.
+    """
+    # Remember the settings the load changes; journal_mode is stored in the file (WAL after --migrate)
+    pragmas = ('synchronous', 'journal_mode', 'temp_store', 'cache_size')
+    saved = {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in pragmas}
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-262144")
+    
+    cursor = conn.cursor()
+    placeholders = ', '.join('?' * len(BULK_TABLES))
+    indexes = cursor.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+        BULK_TABLES).fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    for fts_table, _ in SEARCH_INDEXES.values():
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+    for summary in SUMMARY_TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {summary}_{suffix}")
+    conn.commit()
+    
+    try:
+        yield conn
+    finally:
+        conn.commit()
+        for _, sql in indexes:
+            cursor.execute(sql)
+        create_indexes(cursor)
+        create_search_indexes(cursor)
+        create_summaries(cursor)
+        conn.commit()
+        cursor.execute("ANALYZE")
+        conn.commit()
+        for pragma in pragmas:
+            conn.execute(f"PRAGMA {pragma}={saved[pragma]}")
+
+# Read rows from a CSV or JSON-lines export one at a time
+@contextlib.contextmanager
+def read_rows(path, columns):
+    """
+    Streams rows from a CSV file (with a header line) or a JSON-lines file.
+    
+    The file stays open until the block ends. JSON-lines records may leave out
+    columns (they are loaded as NULL), but the columns loaded are those of the first
+    record, so a later record with any other field is rejected rather than losing it.
+    
+    Args:
+        path (str): Path to a .csv or .jsonl file.
+        columns (list): Columns of the target table; fields outside this list are rejected.
+    
+    Yields:
+        tuple: (column names in the file, iterator of row tuples).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"{path} is empty; CSV files need a header line")
+            rows = (tuple(value if value != '' else None for value in row) for row in reader)
+        else:
+            records = ((number, json.loads(line)) for number, line in enumerate(f, 1) if line.strip())
+            first = next(records, None)
+            if first is None:
+                yield [], iter(())
+                return
+            if not isinstance(first[1], dict):
+                raise ValueError(f"{path}, line {first[0]}: expected a JSON object")
+            header = list(first[1])
+            fields = set(header)
+            rows = (_record_values(path, number, record, header, fields)
+                    for number, record in itertools.chain([first], records))
+        unknown = set(header) - set(columns)
+        if unknown:
+            raise ValueError(f"{path} has columns that are not in the table: {sorted(unknown)}")
+        yield header, rows
+
+# Function to turn one JSON-lines record into a row with the file's columns
+def _record_values(path, number, record, header, fields):
+    if not isinstance(record, dict):
+        raise ValueError(f"{path}, line {number}: expected a JSON object")
+    extra = record.keys() - fields
+    if extra:
+        raise ValueError(f"{path}, line {number}: fields not in the first record: {sorted(extra)}")
+    return tuple(record.get(column) for column in header)
+
+# Insert rows in large executemany batches
+def insert_rows(cursor, table, columns, rows, batch_size=BULK_BATCH_SIZE):
+    """
+    Inserts rows into a table with executemany, batch_size rows at a time.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the target database.
+        table (str): Table name.
+        columns (list): Column names, in the order of the row values.
+        rows (iterable): Row tuples; consumed lazily, so memory use does not depend on its length.
+        batch_size (int): Rows per executemany call.
+    
+    Returns:
+        int: Number of rows inserted.
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    rows = iter(rows)
+    count = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return count
+        cursor.executemany(sql, batch)
+        count += len(batch)
+
+# Load a catalog, customer or order export into a table
+def bulk_load(conn, table, path, batch_size=BULK_BATCH_SIZE):
+    """
+    Streams a CSV or JSON-lines file into a table in a single transaction.
+    
+    Run inside bulk_load_phase() when loading large files.
+    
+    Args:
+        conn (sqlite3.Connection): Connection to the target database.
+        table (str): Table to load into.
+        path (str): Path to the .csv or .jsonl file.
+        batch_size (int): Rows per executemany call.
+    
+    Returns:
+        int: Number of rows loaded.
+    """
+    if table not in BULK_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    table_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    with read_rows(path, table_columns) as (columns, rows):
+        if not columns:
+            return 0
+        count = insert_rows(conn.cursor(), table, columns, rows, batch_size)
+    conn.commit()
+    return count
+
+# Word lists for the synthetic data generator
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Lucia',
+               'Wei', 'Aisha', 'Hiroshi', 'Fatima', 'Ivan', 'Sofia', 'Omar', 'Elena', 'Raj', 'Ana']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee',
+              'Chen', 'Khan', 'Tanaka', 'Ivanova', 'Rossi', 'Muller', 'Silva', 'Kim', 'Patel', 'Nguyen']
+PRODUCT_ADJECTIVES = ['Smart', 'Wireless', 'Portable', 'Ultra', 'Compact', 'Pro', 'Gaming', 'Digital', 'Premium', 'Eco']
+PRODUCT_NOUNS = ['Phone', 'Laptop', 'Watch', 'Headphones', 'Speaker', 'Monitor', 'Keyboard', 'Mouse', 'Tablet',
+                 'Camera', 'Router', 'Charger', 'Refrigerator', 'Microwave', 'Vacuum', 'Console', 'Drone', 'Printer']
+PRODUCT_FEATURES = ['long battery life', 'fast charging', 'a high-resolution display', 'low latency', 'energy efficiency',
+                    'noise cancellation', 'a compact design', 'advanced sensors', 'multiple modes', 'a premium finish']
+REVIEW_TEXTS = ['Excellent product!', 'Good but not great.', 'Works as expected.', 'Would buy again.',
+                'Stopped working after a month.', 'Great value for the price.', 'Not what I expected.',
+                'Perfect for my needs.', 'Shipping was slow but the product is fine.', 'Highly recommended.']
+
+# Generate large, realistic datasets for load testing
+def generate_data(conn, products=10000, customers=100000, orders=1000000, reviews=200000, seed=0,
+                  start_date=date(2023, 1, 1), days=1095, batch_size=BULK_BATCH_SIZE):
+    """
+    Fills products, customers, orders, order_items and product_reviews with synthetic rows.
+    
+    The same seed always produces the same data. Rows are generated and inserted in
+    batches, so memory use stays flat apart from one price per product, which is needed
+    to compute order totals. New rows get ids after the existing ones, and the categories
+    must already exist (create_schema plus insert_example_data, or a bulk load).
+    Run inside bulk_load_phase() for large sizes.
+    
+    Args:
+        conn (sqlite3.Connection): Connection to the target database.
+        products (int): Number of products to add.
+        customers (int): Number of customers to add.
+        orders (int): Number of orders to add, each with one to four items.
+        reviews (int): Number of product reviews to add.
+        seed (int): Random seed.
+        start_date (date): Earliest order date.
+        days (int): Number of days the order dates are spread over.
+        batch_size (int): Rows per executemany call.
+    
+    Returns:
+        dict: Number of rows added to each table.
+    """
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    
+    def next_id(table):
+        return (cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0] or 0) + 1
+    
+    category_ids = [row[0] for row in cursor.execute("SELECT id FROM categories")] or [None]
+    counts = {}
+    
+    # Products; keep their prices to compute order totals
+    first_product = next_id('products')
+    prices = []
+    def product_rows():
+        for i in range(products):
+            noun = rng.choice(PRODUCT_NOUNS)
+            price = round(rng.uniform(9.99, 2499.99), 2)
+            prices.append(price)
+            yield (first_product + i, f"{rng.choice(PRODUCT_ADJECTIVES)} {noun} {1000 + i}",
+                   f"{noun} with {rng.choice(PRODUCT_FEATURES)} and {rng.choice(PRODUCT_FEATURES)}",
+                   price, rng.randint(0, 500), rng.choice(category_ids))
+    counts['products'] = insert_rows(cursor, 'products', ['id', 'name', 'description', 'price', 'stock_quantity', 'category_id'],
+                                     product_rows(), batch_size)
+    
+    # Customers
+    first_customer = next_id('customers')
+    def customer_rows():
+        for i in range(customers):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            customer_id = first_customer + i
+            yield (customer_id, f"{first} {last}", f"{first.lower()}.{last.lower()}{customer_id}@example.com",
+                   f"{rng.randint(200, 999)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}")
+    counts['customers'] = insert_rows(cursor, 'customers', ['id', 'name', 'email', 'phone'], customer_rows(), batch_size)
+    conn.commit()
+    
+    # Orders and their items, generated together so each order total matches its items
+    if prices and customers:
+        first_order = next_id('orders')
+        first_item = next_id('order_items')
+        item_id = first_item
+        counts['orders'] = 0
+        for batch_start in range(0, orders, batch_size):
+            order_batch = []
+            item_batch = []
+            for order_id in range(first_order + batch_start, first_order + min(batch_start + batch_size, orders)):
+                total = 0.0
+                for _ in range(rng.randint(1, 4)):
+                    product_index = rng.randrange(len(prices))
+                    quantity = rng.randint(1, 3)
+                    total += prices[product_index] * quantity
+                    item_batch.append((item_id, order_id, first_product + product_index, quantity))
+                    item_id += 1
+                order_date = (start_date + timedelta(days=rng.randrange(days))).isoformat()
+                order_batch.append((order_id, first_customer + rng.randrange(customers), order_date, round(total, 2)))
+            cursor.executemany("INSERT INTO orders (id, customer_id, order_date, total) VALUES (?, ?, ?, ?)", order_batch)
+            cursor.executemany("INSERT INTO order_items (id, order_id, product_id, quantity) VALUES (?, ?, ?, ?)", item_batch)
+            counts['orders'] += len(order_batch)
+        counts['order_items'] = item_id - first_item
+        conn.commit()
+    
+        # Reviews
+        first_review = next_id('product_reviews')
+        def review_rows():
+            for i in range(reviews):
+                yield (first_review + i, first_product + rng.randrange(len(prices)), first_customer + rng.randrange(customers),
+                       rng.choice(REVIEW_TEXTS), rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 5])[0])
+        counts['product_reviews'] = insert_rows(cursor, 'product_reviews', ['id', 'product_id', 'customer_id', 'review', 'rating'],
+                                                review_rows(), batch_size)
+    conn.commit()
+    return counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create the electronics store database.")
+    parser.add_argument('--db', default=DB_PATH, help="Path to the database file.")
+    parser.add_argument('--migrate', action='store_true', help="Only upgrade an existing database; do not insert example data.")
+    parser.add_argument('--rebuild-summaries', action='store_true',
+                        help="Recompute the summary tables from orders, order items and reviews.")
+    parser.add_argument('--load', action='append', default=[], metavar='TABLE=FILE',
+                        help="Bulk-load a .csv or .jsonl export into a table. Can be repeated.")
+    parser.add_argument('--generate', action='store_true', help="Add synthetic products, customers, orders and reviews.")
+    parser.add_argument('--products', type=int, default=10000, help="Products to generate.")
+    parser.add_argument('--customers', type=int, default=100000, help="Customers to generate.")
+    parser.add_argument('--orders', type=int, default=1000000, help="Orders to generate.")
+    parser.add_argument('--reviews', type=int, default=200000, help="Reviews to generate.")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the generator.")
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE, help="Rows per executemany call.")
+    args = parser.parse_args()
+    
+    if args.migrate:
+        migrate(args.db)
+    elif args.rebuild_summaries:
+        conn = sqlite3.connect(args.db)
+        create_schema(conn.cursor())
+        with conn:
+            # Also recreates the triggers if they were dropped
+            for summary, count in create_summaries(conn.cursor()).items():
+                print(f"Rebuilt {summary}: {count} rows")
+        conn.close()
+    elif args.load or args.generate:
+        conn = sqlite3.connect(args.db)
+        create_schema(conn.cursor())
+        conn.commit()
+        with bulk_load_phase(conn):
+            for spec in args.load:
+                table, _, path = spec.partition('=')
+                print(f"Loaded {bulk_load(conn, table, path, args.batch_size)} rows into {table}")
+            if args.generate:
+                if not conn.execute("SELECT 1 FROM categories LIMIT 1").fetchone():
+                    insert_example_data(conn.cursor())
+                counts = generate_data(conn, products=args.products, customers=args.customers, orders=args.orders,
+                                       reviews=args.reviews, seed=args.seed, batch_size=args.batch_size)
+                for table, count in counts.items():
+                    print(f"Generated {count} rows in {table}")
+        conn.close()
+    else:
+        # Create a connection to the database
+        conn = sqlite3.connect(args.db)
+        cursor = conn.cursor()
+        
+        create_schema(cursor)
+        create_search_indexes(cursor)
+        create_summaries(cursor)
+        create_indexes(cursor)
+        insert_example_data(cursor)
+        
+        # Commit changes
+        conn.commit()
+        
+        # Close
+        conn.close()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import app
+
+# Labeled questions: one JSON object per line with 'question' and the expected 'intent' ('none' for the generic answer)
+TEST_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_test_set.jsonl')
+
+# Function to load the labeled questions
+def load_test_set(path=TEST_SET_PATH):
+    """
+    Reads the labeled intent questions.
+
+    Args:
+        path (str): Path to the JSON-lines test set.
+
+    Returns:
+        list: Dictionaries with 'question' and 'intent'.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Function to measure how often a matcher picks the expected intent
+def accuracy(predicted, test_set):
+    """
+    Compares predicted intents with the labels.
+
+    Args:
+        predicted (list): Matched intent dictionaries (or None), one per question.
+        test_set (list): Questions from load_test_set().
+
+    Returns:
+        tuple: (share of correct predictions, list of (question, expected, predicted) mistakes).
+    """
+    mistakes = []
+    for intent, entry in zip(predicted, test_set):
+        name = intent['name'] if intent is not None else 'none'
+        if name != entry['intent']:
+            mistakes.append((entry['question'], entry['intent'], name))
+    return 1 - len(mistakes) / len(test_set), mistakes
+
+# Function to time a matcher
+def time_per_question(match, questions, repeat):
+    """
+    Returns the mean time per question, in microseconds.
+
+    Args:
+        match (callable): Takes the list of questions and returns their intents.
+        questions (list): Lowercased questions.
+        repeat (int): Number of timed passes.
+
+    Returns:
+        float: Microseconds per question.
+    """
+    match(questions)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        match(questions)
+    return 1e6 * (time.perf_counter() - start) / (repeat * len(questions))
+
+# Function to run the comparison from the command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the keyword rules with the intent classifier.")
+    parser.add_argument('--test-set', default=TEST_SET_PATH, help="JSON-lines file of labeled questions.")
+    parser.add_argument('--threshold', type=float, default=app.CLASSIFIER_THRESHOLD, help="Classifier confidence threshold.")
+    parser.add_argument('--sweep', action='store_true', help="Also report accuracy for a range of thresholds.")
+    parser.add_argument('--repeat', type=int, default=50, help="Timed passes over the test set.")
+    parser.add_argument('--show-mistakes', action='store_true', help="List the misclassified questions.")
+    args = parser.parse_args(argv)
+
+    test_set = load_test_set(args.test_set)
+    questions = [entry['question'].lower() for entry in test_set]
+    classifier = app.IntentClassifier(app.ALL_INTENTS, threshold=args.threshold)
+
+    matchers = {
+        'rules': lambda texts: [app.intent_matcher.match(text) for text in texts],
+        'classifier': lambda texts: [classifier.intents[index] for index in classifier.scores(texts).argmax(axis=1)],
+        'hybrid (batch)': classifier.classify_many,
+        'hybrid (one at a time)': lambda texts: [classifier.classify_many([text])[0] for text in texts],
+    }
+
+    print(f"{len(test_set)} labeled questions, threshold {args.threshold}")
+    for name, match in matchers.items():
+        score, mistakes = accuracy(match(questions), test_set)
+        micros = time_per_question(match, questions, args.repeat)
+        print(f"  {name}: accuracy {score:.1%}, {micros:.1f} us per question")
+        if args.show_mistakes:
+            for question, expected, predicted in mistakes:
+                print(f"      {question!r}: expected {expected}, got {predicted}")
+
+    if args.sweep:
+        print("\nHybrid accuracy by threshold:")
+        for step in range(0, 10):
+            classifier.threshold = step / 10
+            score, _ = accuracy(classifier.classify_many(questions), test_set)
+            print(f"  {classifier.threshold:.1f}: {score:.1%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
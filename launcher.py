@@ -0,0 +1,212 @@
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+# Pre-fork launcher: the models are loaded once in this parent process and the worker
+# processes are forked from it, so every worker shares the same physical memory pages
+# for the spaCy model and the NLTK data (copy-on-write) instead of loading its own copy.
+#
+# gc.freeze() moves every object that exists at fork time into a permanent generation
+# that the garbage collector never scans. Without it, the first collection in each worker
+# writes to the GC headers of the model's objects and the kernel has to copy those pages,
+# which slowly turns shared memory back into private memory.
+#
+# Memory per worker is read from /proc/<pid>/smaps_rollup (Linux only):
+#   rss     - resident memory, counting shared pages in full
+#   shared  - resident pages also mapped by other processes (mostly the model)
+#   private - pages only this worker uses
+#   pss     - proportional set size: private pages plus an equal share of each shared page.
+#             The sum of pss over all workers is their real combined memory use.
+
+# Function to read a process's memory usage
+def memory_usage(pid):
+    """
+    Reads the resident, shared and private memory of a process.
+
+    Args:
+        pid (int): Process id.
+
+    Returns:
+        dict: rss, pss, shared and private sizes in kB, or None if they cannot be read.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    shared = fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'rss': fields.get('Rss', 0), 'pss': fields.get('Pss', 0), 'shared': shared, 'private': private}
+
+# Function to log and print a memory report for the parent and all workers
+def report_memory(parent_pid, worker_pids):
+    """
+    Prints and logs resident, shared and private memory for the parent and each worker.
+
+    Args:
+        parent_pid (int): Process id of the launcher.
+        worker_pids (list): Process ids of the workers.
+    """
+    total_pss = 0
+    lines = []
+    for label, pid in [('parent', parent_pid)] + [('worker', pid) for pid in worker_pids]:
+        usage = memory_usage(pid)
+        if usage is None:
+            continue
+        total_pss += usage['pss']
+        lines.append(f"{label} {pid}: rss={usage['rss'] // 1024}MB shared={usage['shared'] // 1024}MB "
+                     f"private={usage['private'] // 1024}MB pss={usage['pss'] // 1024}MB")
+    if not lines:
+        return
+    lines.append(f"total pss={total_pss // 1024}MB")
+    for line in lines:
+        logging.info("Memory: %s", line)
+        print(line, file=sys.stderr)
+
+# Function run in each forked worker
+def run_worker(listen_socket, host, port, threads):
+    """
+    Serves the Flask app on the listening socket inherited from the parent. Never returns.
+
+    Args:
+        listen_socket (socket.socket): The shared listening socket.
+        host (str): Host the socket is bound to.
+        port (int): Port the socket is bound to.
+        threads (bool): Whether each worker handles requests in threads.
+    """
+    from werkzeug.serving import make_server
+    import app
+
+    # Objects created from now on belong to this worker and are collected as usual
+    gc.enable()
+    # The parent's log writer thread does not exist in the child; start this worker's own
+    app.configure_logging()
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    exit_code = 0
+    try:
+        server = make_server(host, port, app.app, threaded=threads, fd=listen_socket.fileno())
+        server.serve_forever()
+    except SystemExit:
+        pass
+    except Exception as e:
+        logging.error("Worker %d failed: %s", os.getpid(), e)
+        exit_code = 1
+    finally:
+        app.close_db_connections()
+        app.stop_logging()
+    os._exit(exit_code)
+
+# Function to fork one worker
+def spawn_worker(listen_socket, host, port, threads):
+    """
+    Forks a worker process.
+
+    Returns:
+        int: The worker's process id.
+    """
+    pid = os.fork()
+    if pid == 0:
+        run_worker(listen_socket, host, port, threads)
+    return pid
+
+# Function to load the models, fork the workers and supervise them
+def main(host='127.0.0.1', port=5000, workers=os.cpu_count() or 1, threads=True, prewarm=True, report_interval=60.0):
+    """
+    Loads the models once, freezes the heap and forks the workers, restarting any that exit.
+
+    Args:
+        host (str): Host to listen on.
+        port (int): Port to listen on.
+        workers (int): Number of worker processes.
+        threads (bool): Whether each worker handles requests in threads.
+        prewarm (bool): Whether to run a dummy document through spaCy before forking.
+        report_interval (float): Seconds between memory reports; 0 disables them.
+    """
+    # Rotating one file from several processes loses records; unless told otherwise, each
+    # worker writes its own file ('{pid}' is replaced by the process id)
+    os.environ.setdefault('CHATBOT_LOG_FILE', 'chatbot-{pid}.log')
+    # Keep the collector from running while the models load, so the objects they
+    # create are laid out compactly before being frozen
+    gc.disable()
+    import app
+    if '{pid}' not in app.LOG_FILE and workers > 1:
+        logging.warning("CHATBOT_LOG_FILE has no {pid}; %d workers will rotate the same file", workers)
+    if prewarm:
+        app.nlp("Prewarm the pipeline for John Smith in New York.")
+    # Workers must open their own SQLite connections; never share one across fork
+    app.close_db_connections()
+
+    listen_socket = socket.create_server((host, port), backlog=1024)
+    listen_socket.set_inheritable(True)
+
+    gc.freeze()
+    logging.info("Launcher %d forking %d workers on %s:%d", os.getpid(), workers, host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers", file=sys.stderr)
+
+    worker_pids = set(spawn_worker(listen_socket, host, port, threads) for _ in range(workers))
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # First report after the workers have had a few seconds to start
+    next_report = time.monotonic() + min(report_interval, 5.0) if report_interval else None
+
+    while not stopping:
+        # Restart any worker that has exited
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in worker_pids:
+            worker_pids.discard(pid)
+            if not stopping:
+                logging.warning("Worker %d exited with status %d; starting a new one", pid, status)
+                worker_pids.add(spawn_worker(listen_socket, host, port, threads))
+
+        if next_report is not None and time.monotonic() >= next_report:
+            report_memory(os.getpid(), sorted(worker_pids))
+            next_report = time.monotonic() + report_interval
+        time.sleep(0.5)
+
+    for pid in worker_pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in worker_pids:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    listen_socket.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the chatbot from pre-forked workers that share one copy of the models.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument('--no-threads', action='store_true', help="Handle one request at a time in each worker.")
+    parser.add_argument('--no-prewarm', action='store_true', help="Do not run a dummy document through spaCy before forking.")
+    parser.add_argument('--report-interval', type=float, default=60.0, help="Seconds between memory reports (0 disables them).")
+    args = parser.parse_args()
+
+    main(host=args.host, port=args.port, workers=args.workers, threads=not args.no_threads,
+         prewarm=not args.no_prewarm, report_interval=args.report_interval)
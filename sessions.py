@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Session settings: records kept per conversation, and the limits of the in-memory store
+SESSION_HISTORY = int(os.environ.get('CHATBOT_SESSION_HISTORY', 10))
+SESSION_MAX_SESSIONS = int(os.environ.get('CHATBOT_SESSION_MAX_SESSIONS', 10000))
+SESSION_IDLE_TIMEOUT = float(os.environ.get('CHATBOT_SESSION_IDLE_TIMEOUT', 1800))
+SESSION_MAX_BYTES = int(os.environ.get('CHATBOT_SESSION_MAX_BYTES', 64 * 1024 * 1024))
+
+# Optional SQLite file that evicted sessions are spilled to, so they survive restarts
+SESSION_DB_PATH = os.environ.get('CHATBOT_SESSION_DB')
+# Seconds a spilled session is kept in that file after its last message
+SESSION_SPILL_TTL = float(os.environ.get('CHATBOT_SESSION_SPILL_TTL', 7 * 24 * 3600))
+
+# Cookie carrying the session id
+SESSION_COOKIE = 'chatbot_session'
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+# Approximate memory of one record and one session besides their strings, in bytes
+RECORD_OVERHEAD = 96
+SESSION_OVERHEAD = sys.getsizeof(deque(maxlen=SESSION_HISTORY)) + 160
+
+# One question and its answer
+class ChatRecord:
+    """
+    A question/answer exchange, stored without a per-instance __dict__.
+
+    Args:
+        question (str): The user's question.
+        response (str): The chatbot's answer.
+        intent (str): Name of the intent that answered, or None.
+        timestamp (float): When the question was answered (seconds since the epoch).
+    """
+
+    __slots__ = ('question', 'response', 'intent', 'timestamp', 'size')
+
+    def __init__(self, question, response, intent=None, timestamp=None):
+        self.question = question
+        self.response = response
+        # Intent names repeat across every session; keep one copy of each
+        self.intent = sys.intern(intent) if intent else None
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.size = sys.getsizeof(question) + sys.getsizeof(response) + RECORD_OVERHEAD
+
+# The recent history of one conversation
+class Session:
+    """
+    Fixed-size ring buffer of a conversation's latest records.
+
+    Args:
+        capacity (int): Number of records kept; older ones are dropped.
+    """
+
+    __slots__ = ('records', 'last_seen', 'size')
+
+    def __init__(self, capacity=SESSION_HISTORY):
+        self.records = deque(maxlen=capacity)
+        self.last_seen = time.time()
+        self.size = SESSION_OVERHEAD
+
+    def append(self, record):
+        """
+        Adds a record, dropping the oldest one when the buffer is full.
+
+        Args:
+            record (ChatRecord): The record to add.
+
+        Returns:
+            int: Change in the session's approximate size, in bytes.
+        """
+        change = record.size
+        if len(self.records) == self.records.maxlen:
+            change -= self.records[0].size
+        self.records.append(record)
+        self.size += change
+        self.last_seen = max(self.last_seen, record.timestamp)
+        return change
+
+# Bounded store of all conversations
+class SessionStore:
+    """
+    Keeps the recent history of each conversation, keyed by session id.
+
+    Sessions are evicted least recently used first when there are more than max_sessions
+    or their approximate size passes max_bytes, and once they have been idle for
+    idle_timeout seconds. With a spill database, evicted sessions are written to SQLite
+    and read back when their user returns, also after a restart.
+
+    Args:
+        capacity (int): Records kept per session.
+        max_sessions (int): Maximum number of sessions in memory.
+        idle_timeout (float): Seconds without a message after which a session leaves memory.
+        max_bytes (int): Approximate memory cap for all sessions.
+        spill_path (str): Optional SQLite file for evicted sessions.
+        spill_ttl (float): Seconds spilled sessions are kept after their last message.
+    """
+
+    def __init__(self, capacity=SESSION_HISTORY, max_sessions=SESSION_MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT,
+                 max_bytes=SESSION_MAX_BYTES, spill_path=SESSION_DB_PATH, spill_ttl=SESSION_SPILL_TTL):
+        self.capacity = capacity
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.spill_ttl = spill_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._spill_conn = None
+        self._spill_pid = None
+        self.bytes = 0
+        self.evictions = 0
+        self.spilled = 0
+        self.restored = 0
+
+    def _spill_connection(self):
+        # Opened on first use, and again in a forked child: a connection must not cross fork
+        if self._spill_conn is None or self._spill_pid != os.getpid():
+            conn = sqlite3.connect(self.spill_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, last_seen REAL, history TEXT)")
+            conn.execute("DELETE FROM sessions WHERE last_seen < ?", (time.time() - self.spill_ttl,))
+            conn.commit()
+            self._spill_conn = conn
+            self._spill_pid = os.getpid()
+        return self._spill_conn
+
+    def _spill(self, sessions):
+        if not self.spill_path or not sessions:
+            return
+        rows = [(session_id, session.last_seen,
+                 json.dumps([[r.question, r.response, r.intent, r.timestamp] for r in session.records]))
+                for session_id, session in sessions]
+        try:
+            with self._spill_lock:
+                conn = self._spill_connection()
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO sessions (id, last_seen, history) VALUES (?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logging.error("Could not spill %d sessions to %s: %s", len(rows), self.spill_path, e)
+            return
+        self.spilled += len(rows)
+
+    def _restore(self, session_id):
+        if not self.spill_path:
+            return None
+        try:
+            with self._spill_lock:
+                conn = self._spill_connection()
+                with conn:
+                    row = conn.execute("SELECT last_seen, history FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                    if row is not None:
+                        # The session lives in memory again until it is evicted
+                        conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        except sqlite3.Error as e:
+            logging.error("Could not read session from %s: %s", self.spill_path, e)
+            return None
+        if row is None or row[0] < time.time() - self.spill_ttl:
+            return None
+        session = Session(self.capacity)
+        for question, response, intent, timestamp in json.loads(row[1]):
+            session.append(ChatRecord(question, response, intent, timestamp))
+        self.restored += 1
+        return session
+
+    def _evict(self, now):
+        # Called with the lock held; returns the evicted sessions so they can be spilled after releasing it
+        evicted = []
+        sessions = self._sessions
+        while sessions:
+            session_id, session = next(iter(sessions.items()))
+            if (len(sessions) <= self.max_sessions and self.bytes <= self.max_bytes
+                    and now - session.last_seen <= self.idle_timeout):
+                break
+            sessions.popitem(last=False)
+            self.bytes -= session.size
+            evicted.append((session_id, session))
+        self.evictions += len(evicted)
+        return evicted
+
+    def _get(self, session_id):
+        # Called with the lock held
+        session = self._sessions.get(session_id)
+        if session is not None:
+            # Most recently used last, so the idle and LRU victims are both at the front
+            self._sessions.move_to_end(session_id)
+            session.last_seen = time.time()
+        return session
+
+    def history(self, session_id):
+        """
+        Returns a session's records, oldest first.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            list: The ChatRecord objects; empty for an unknown session.
+        """
+        with self._lock:
+            session = self._get(session_id)
+            if session is not None:
+                return list(session.records)
+        session = self._restore(session_id)
+        if session is None:
+            return []
+        with self._lock:
+            # Another thread may have created the session meanwhile; keep the one already in memory
+            if session_id not in self._sessions:
+                self._sessions[session_id] = session
+                self.bytes += session.size
+            records = list(self._sessions[session_id].records)
+            evicted = self._evict(time.time())
+        self._spill(evicted)
+        return records
+
+    def append(self, session_id, question, response, intent=None):
+        """
+        Adds a question and its answer to a session, creating the session if needed.
+
+        Args:
+            session_id (str): The session id.
+            question (str): The user's question.
+            response (str): The chatbot's answer.
+            intent (str): Name of the intent that answered, if known.
+        """
+        record = ChatRecord(question, response, intent)
+        restored = None
+        with self._lock:
+            session = self._get(session_id)
+        if session is None:
+            # Outside the lock: reading the spill file may take a while
+            restored = self._restore(session_id)
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                session = restored or Session(self.capacity)
+                self._sessions[session_id] = session
+                self.bytes += session.size
+            self.bytes += session.append(record)
+            evicted = self._evict(record.timestamp)
+        self._spill(evicted)
+
+    def stats(self):
+        """
+        Returns the store's counters.
+
+        Returns:
+            dict: Sessions and approximate bytes in memory, evictions, spilled and restored sessions.
+        """
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': self.bytes,
+                'evictions': self.evictions,
+                'spilled': self.spilled,
+                'restored': self.restored,
+            }
+
+    def close(self):
+        """
+        Spills every session in memory (when a spill database is set) and closes the spill connection.
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+            self._sessions.clear()
+            self.bytes = 0
+        self._spill(sessions)
+        with self._spill_lock:
+            if self._spill_conn is not None and self._spill_pid == os.getpid():
+                self._spill_conn.close()
+            self._spill_conn = None
+
+# Function to read or create the session id of a request
+def session_id_from_cookie(value):
+    """
+    Validates a session cookie value, creating a new id if it is missing or malformed.
+
+    Args:
+        value (str): The cookie value, or None.
+
+    Returns:
+        tuple: (session id, True if the id is new and the cookie must be set).
+    """
+    if value and _SESSION_ID.match(value):
+        return value, False
+    return secrets.token_urlsafe(16), True
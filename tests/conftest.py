@@ -0,0 +1,69 @@
+# Shared test setup. The settings in app.py are read from the environment at import time,
+# so they are set here, before any test module imports it:
+# - a temporary copy of the example database, built with database.py
+# - a small spaCy pipeline saved to disk whose entity ruler knows a few fixed names, so
+#   entity answers do not depend on which statistical model is installed
+# - no NLTK downloads, and logs written to the temporary directory
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+import spacy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database
+
+TEST_DIR = tempfile.mkdtemp(prefix='chatbot-tests-')
+TEST_DB_PATH = os.path.join(TEST_DIR, 'store.db')
+TEST_MODEL_PATH = os.path.join(TEST_DIR, 'ner_model')
+
+# Entities the test pipeline recognizes in lowercased questions
+ENTITY_PATTERNS = [
+    {'label': 'PERSON', 'pattern': 'john doe'},
+    {'label': 'PERSON', 'pattern': 'jane smith'},
+    {'label': 'GPE', 'pattern': 'paris'},
+    {'label': 'ORG', 'pattern': 'acme'},
+]
+
+# Function to create the example database with every table, index and trigger
+def build_database(path):
+    """
+    Creates a database like python database.py does.
+
+    Args:
+        path (str): Path of the new database file.
+    """
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    database.create_schema(cursor)
+    database.create_search_indexes(cursor)
+    database.create_summaries(cursor)
+    database.create_indexes(cursor)
+    database.insert_example_data(cursor)
+    conn.commit()
+    conn.close()
+
+build_database(TEST_DB_PATH)
+_pipeline = spacy.blank('en')
+_pipeline.add_pipe('entity_ruler').add_patterns(ENTITY_PATTERNS)
+_pipeline.to_disk(TEST_MODEL_PATH)
+
+os.environ['CHATBOT_DB_PATH'] = TEST_DB_PATH
+os.environ['CHATBOT_SPACY_MODEL'] = TEST_MODEL_PATH
+os.environ['CHATBOT_OFFLINE'] = '1'
+os.environ['CHATBOT_LOG_FILE'] = os.path.join(TEST_DIR, 'chatbot-{pid}.log')
+os.environ.pop('CHATBOT_SESSION_DB', None)
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    """
+    Starts every test with empty catalog and response caches, so answers are computed afresh.
+    """
+    import app
+    app.response_cache.clear()
+    app.catalog_cache.clear()
+    yield
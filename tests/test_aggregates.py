@@ -0,0 +1,82 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import app
+import database
+
+# What each summary table should hold, computed from the source tables
+EXPECTED = {
+    'customer_order_totals': "SELECT customer_id, COUNT(*), SUM(COALESCE(total, 0)) FROM orders "
+                             "WHERE customer_id IS NOT NULL GROUP BY customer_id",
+    'product_sales': "SELECT product_id, SUM(COALESCE(quantity, 0)) FROM order_items "
+                     "WHERE product_id IS NOT NULL GROUP BY product_id",
+    'product_rating_totals': "SELECT product_id, COUNT(rating), SUM(COALESCE(rating, 0)) FROM product_reviews "
+                             "WHERE product_id IS NOT NULL GROUP BY product_id",
+}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def assert_summaries_match(conn):
+    for summary, query in EXPECTED.items():
+        # Rows whose counts dropped back to zero may stay in the summary
+        expected = {row[0]: pytest.approx(row[1:]) for row in conn.execute(query) if any(row[1:])}
+        actual = {row[0]: row[1:] for row in conn.execute(f"SELECT * FROM {summary}") if any(row[1:])}
+        assert actual == expected, summary
+
+
+def test_triggers_keep_the_summaries_in_step(conn):
+    assert_summaries_match(conn)
+    with conn:
+        order_id = conn.execute("INSERT INTO orders (customer_id, order_date, total) VALUES (2, '2024-01-01', 10.5)").lastrowid
+        conn.execute("INSERT INTO order_items (order_id, product_id, quantity) VALUES (?, 4, 7)", (order_id,))
+        conn.execute("INSERT INTO product_reviews (product_id, customer_id, review, rating) VALUES (4, 2, 'Fine', 4)")
+    assert_summaries_match(conn)
+    with conn:
+        conn.execute("UPDATE orders SET customer_id = 5, total = 20 WHERE id = ?", (order_id,))
+        conn.execute("UPDATE order_items SET product_id = 3 WHERE order_id = ?", (order_id,))
+        conn.execute("UPDATE product_reviews SET rating = NULL WHERE product_id = 4")
+    assert_summaries_match(conn)
+    with conn:
+        conn.execute("DELETE FROM order_items WHERE order_id = ?", (order_id,))
+        conn.execute("DELETE FROM orders WHERE customer_id = 1")
+        conn.execute("DELETE FROM product_reviews")
+    assert_summaries_match(conn)
+
+
+def test_rebuild_repairs_drifted_summaries(conn):
+    with conn:
+        conn.execute("UPDATE customer_order_totals SET total_spent = 0")
+        conn.execute("DELETE FROM product_sales")
+        database.create_summaries(conn.cursor())
+    assert_summaries_match(conn)
+
+
+@pytest.mark.parametrize('mode', ['tiered', 'ner_first'])
+def test_spending_questions_about_a_person_are_answered_from_orders(monkeypatch, mode):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', mode)
+    response = app.respond_to_question("How much has John Doe spent?")
+    assert response.startswith("Customer Name: John Doe, Orders: 2, Total Spent: $2999.98")
+    assert app.respond_to_questions(["How much has John Doe spent?"]) == [response]
+
+
+@pytest.mark.parametrize('mode', ['tiered', 'ner_first'])
+def test_person_questions_still_find_employees(monkeypatch, mode):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', mode)
+    assert app.respond_to_question("Who is Jane Smith?").startswith("Employee Name: Jane Smith")
+
+
+def test_best_sellers_accept_a_limit():
+    answer = app.get_best_sellers(limit=2)
+    assert answer.startswith("Best sellers: ")
+    assert answer.count(" sold)") == 2
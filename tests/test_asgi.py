@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+import asgi_app
+
+
+# Function to send one HTTP request through the ASGI application
+async def call(method, path, body=b'', headers=()):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': list(headers)}
+    await asgi_app.app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+# Function to run requests with the worker pools started; spaCy runs in a thread unless spawn is set
+def serve(scenario, spawn=False):
+    async def main():
+        asgi_app.start_pools(ner_workers=1, db_threads=2)
+        if not spawn:
+            asgi_app._ner_executor.shutdown()
+            asgi_app._ner_executor = ThreadPoolExecutor(1)
+        try:
+            return await scenario()
+        finally:
+            asgi_app.stop_pools()
+    return asyncio.run(main())
+
+
+# Function to read one sample from the Prometheus metrics
+def metric_value(name):
+    for line in app.metrics.render():
+        if line.startswith(name + ' '):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def summary_records(caplog):
+    return [record for record in caplog.records if record.getMessage().startswith("Request ")]
+
+
+def test_chat_page_records_the_intent_in_the_session():
+    async def scenario():
+        status, headers, body = await call('POST', '/', b'pregunta=what+are+your+hours')
+        session_id = headers[b'set-cookie'].split(b';')[0].split(b'=', 1)[1].decode()
+        return status, app.session_store.history(session_id)
+
+    status, history = serve(scenario)
+    assert status == 200
+    [record] = history
+    assert record.intent == 'hours'
+
+
+def test_answers_are_logged_with_the_request_id_and_intent(caplog):
+    caplog.set_level(logging.INFO)
+    before = metric_value('chatbot_intent_total{intent="contact"}')
+
+    async def scenario():
+        return await call('POST', '/api/answer', b'{"question": "what is your email?"}',
+                          [(b'x-request-id', b'req-123')])
+
+    status, _, _ = serve(scenario)
+    assert status == 200
+    [summary] = summary_records(caplog)
+    assert summary.request_id == 'req-123'
+    assert summary.intent == 'contact'
+    assert 'keyword' in summary.stages
+    assert metric_value('chatbot_intent_total{intent="contact"}') == before + 1
+
+
+def test_entity_answers_are_counted(caplog):
+    caplog.set_level(logging.INFO)
+
+    async def scenario():
+        return await call('POST', '/api/answer', b'{"question": "who is jane smith?"}')
+
+    status, _, body = serve(scenario)
+    assert b'Sales Manager' in body
+    [summary] = summary_records(caplog)
+    assert summary.intent == 'entity_person'
+
+
+def test_ner_time_from_worker_processes_is_in_the_server_metrics(caplog):
+    caplog.set_level(logging.INFO)
+    before = metric_value('chatbot_stage_seconds_count{stage="ner"}')
+
+    async def scenario():
+        return await call('POST', '/api/answer', b'{"question": "who is john doe?"}')
+
+    status, _, _ = serve(scenario, spawn=True)
+    assert status == 200
+    assert metric_value('chatbot_stage_seconds_count{stage="ner"}') == before + 1
+    [summary] = summary_records(caplog)
+    assert 'ner' in summary.stages
@@ -0,0 +1,32 @@
+import app
+
+
+def post_batch(payload):
+    client = app.app.test_client()
+    return client.post('/api/answer/batch', json=payload)
+
+
+def test_batch_answers_each_question_in_order():
+    response = post_batch({'questions': ['hello', 'what is the price of the laptop']})
+    assert response.status_code == 200
+    answers = response.get_json()['answers']
+    assert len(answers) == 2
+    assert 'Laptop Y' in answers[1]
+
+
+def test_batch_rejects_too_many_questions(monkeypatch):
+    monkeypatch.setattr(app, 'BATCH_MAX_QUESTIONS', 2)
+    response = post_batch({'questions': ['hello'] * 3})
+    assert response.status_code == 400
+    assert 'at most 2 questions' in response.get_json()['error']
+
+
+def test_batch_rejects_non_integer_batch_size():
+    for batch_size in (2.5, '64', True, None):
+        response = post_batch({'questions': ['hello'], 'batch_size': batch_size})
+        assert response.status_code == 400
+
+
+def test_batch_rejects_non_positive_batch_size():
+    response = post_batch({'questions': ['hello'], 'batch_size': 0})
+    assert response.status_code == 400
@@ -0,0 +1,39 @@
+import app
+import benchmark
+
+
+def test_stage_functions_exist():
+    for names in benchmark.STAGES.values():
+        for name in names:
+            assert callable(getattr(app, name)), name
+
+
+def test_aggregate_lookups_count_as_db_time():
+    timer = benchmark.StageTimer()
+    with timer:
+        app.respond_to_question("how much has john doe spent?")
+    assert timer.calls['db'] == 1
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert benchmark.percentile(values, 0.5) == 5
+    assert benchmark.percentile(values, 0.95) == 10
+    assert benchmark.percentile([], 0.5) == 0.0
+
+
+def test_slower_runs_are_reported_as_regressions(capsys):
+    def run(rps, p50):
+        return {'targets': {'function': {'throughput_rps': rps, 'latency_ms': {'p50': p50, 'p95': p50, 'p99': p50}}}}
+
+    assert benchmark.compare(run(100, 1.0), run(100, 1.0), 0.1) == []
+    assert benchmark.compare(run(105, 1.05), run(100, 1.0), 0.1) == []
+    regressions = benchmark.compare(run(80, 1.0), run(100, 1.0), 0.1)
+    assert regressions == ["function throughput_rps -20.0%"]
+
+
+def test_every_corpus_question_is_answered_without_errors():
+    corpus = benchmark.load_corpus()
+    result = benchmark.run_target('function', corpus, iterations=1, warmup=0)
+    assert result['requests'] == len(corpus) and result['errors'] == 0
+    assert benchmark.check_cached_answers(corpus) == []
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+import chatbot
+
+QUESTIONS = ["what are your hours?", "where are you located?", '{"question": "what is your email?", "id": 7}',
+             "", "do you have careers?", "{not json", "what services do you offer?", "faq", "hello"]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def write_questions(tmp_path):
+    path = tmp_path / 'questions.txt'
+    path.write_text('\n'.join(QUESTIONS) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def read_answers(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_answers_keep_input_order_and_report_bad_lines(tmp_path):
+    output = str(tmp_path / 'answers.jsonl')
+    assert chatbot.answer_file(write_questions(tmp_path), output, workers=0, chunk_size=2) == 8
+    answers = read_answers(output)
+    assert [answer['line'] for answer in answers] == [1, 2, 3, 5, 6, 7, 8, 9]
+    assert answers[2]['id'] == 7 and 'email' in answers[2]['answer']
+    assert 'error' in answers[4] and 'answer' not in answers[4]
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path, monkeypatch):
+    source = write_questions(tmp_path)
+    expected = str(tmp_path / 'expected.jsonl')
+    chatbot.answer_file(source, expected, workers=0, chunk_size=2)
+
+    output = str(tmp_path / 'answers.jsonl')
+    checkpoint = output + '.checkpoint'
+    answer_chunk = chatbot.answer_chunk
+    calls = []
+
+    def fail_on_fourth_chunk(chunk):
+        calls.append(chunk)
+        if len(calls) == 4:
+            raise Interrupted()
+        return answer_chunk(chunk)
+
+    monkeypatch.setattr(chatbot, 'answer_chunk', fail_on_fourth_chunk)
+    with pytest.raises(Interrupted):
+        chatbot.answer_file(source, output, workers=0, chunk_size=2, checkpoint_path=checkpoint, checkpoint_every=2)
+    with open(checkpoint, encoding='utf-8') as f:
+        assert json.load(f)['lines'] >= 2
+    monkeypatch.undo()
+    # Output written after the last checkpoint, such as a half-written line, is dropped on resume
+    with open(output, 'ab') as f:
+        f.write(b'{"line": 5, "ans')
+
+    chatbot.answer_file(source, output, workers=0, chunk_size=2, checkpoint_path=checkpoint, checkpoint_every=2,
+                        resume=True)
+    assert read_answers(output) == read_answers(expected)
+    assert not os.path.exists(checkpoint)
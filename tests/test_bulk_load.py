@@ -0,0 +1,67 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_csv_rows_are_loaded_with_empty_fields_as_null(conn, tmp_path):
+    path = write(tmp_path, 'customers.csv', "name,email,phone\nAda Lovelace,ada@example.com,\nAlan Turing,,555\n")
+    assert database.bulk_load(conn, 'customers', path) == 2
+    rows = conn.execute("SELECT name, email, phone FROM customers WHERE name IN ('Ada Lovelace', 'Alan Turing') ORDER BY name").fetchall()
+    assert rows == [('Ada Lovelace', 'ada@example.com', None), ('Alan Turing', None, '555')]
+
+
+def test_empty_csv_is_rejected(conn, tmp_path):
+    with pytest.raises(ValueError, match="header line"):
+        database.bulk_load(conn, 'customers', write(tmp_path, 'customers.csv', ""))
+
+
+def test_unknown_columns_are_rejected(conn, tmp_path):
+    with pytest.raises(ValueError, match="not in the table"):
+        database.bulk_load(conn, 'customers', write(tmp_path, 'customers.csv', "name,nickname\nAda,A\n"))
+
+
+def test_jsonl_records_may_leave_out_columns(conn, tmp_path):
+    path = write(tmp_path, 'customers.jsonl', '{"name": "Ada Lovelace", "email": "ada@example.com"}\n\n{"name": "Alan Turing"}\n')
+    assert database.bulk_load(conn, 'customers', path) == 2
+    assert conn.execute("SELECT email FROM customers WHERE name = 'Alan Turing'").fetchone() == (None,)
+
+
+def test_jsonl_records_with_new_fields_are_rejected(conn, tmp_path):
+    path = write(tmp_path, 'customers.jsonl', '{"name": "Ada Lovelace"}\n{"name": "Alan Turing", "email": "alan@example.com"}\n')
+    with pytest.raises(ValueError, match="line 2"):
+        database.bulk_load(conn, 'customers', path)
+
+
+def test_empty_jsonl_loads_nothing(conn, tmp_path):
+    assert database.bulk_load(conn, 'customers', write(tmp_path, 'customers.jsonl', "\n")) == 0
+
+
+def test_bulk_load_phase_restores_indexes_and_pragmas(conn, tmp_path):
+    indexes = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone()
+    mode = conn.execute("PRAGMA journal_mode").fetchone()
+    path = write(tmp_path, 'products.csv', "name,description,price,stock_quantity\nDrone Q,Camera drone,499.0,3\n")
+    with database.bulk_load_phase(conn):
+        database.bulk_load(conn, 'products', path)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone() == indexes
+    assert conn.execute("PRAGMA journal_mode").fetchone() == mode
+    # The full-text index is rebuilt, so the new product can be searched
+    assert conn.execute(database.QUERIES['product_search'], ('"drone"',)).fetchone()[0] == 'Drone Q'
@@ -0,0 +1,99 @@
+import os
+import shutil
+import sqlite3
+
+import app
+
+
+def copy_database(tmp_path):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    return path
+
+
+def test_query_cache_evicts_least_recently_used():
+    cache = app.QueryCache(app.db, maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_query_cache_expires_entries():
+    cache = app.QueryCache(app.db, ttl=-1)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+def test_query_cache_is_dropped_when_the_database_changes(tmp_path):
+    manager = app.ConnectionManager(copy_database(tmp_path))
+    cache = app.QueryCache(manager, check_interval=0)
+    try:
+        assert cache.get('a') is None
+        cache.put('a', 1)
+        assert cache.get('a') == 1
+        writer = sqlite3.connect(manager.path)
+        with writer:
+            writer.execute("UPDATE products SET price = price + 1 WHERE id = 1")
+        writer.close()
+        assert cache.get('a') is None
+        assert cache.stats()['invalidations'] == 1
+    finally:
+        cache.close()
+        manager.close_all()
+
+
+def test_query_cache_skips_values_computed_before_an_invalidation():
+    cache = app.QueryCache(app.db)
+    version = cache.invalidations
+    cache.invalidations += 1
+    cache.put('a', 1, version)
+    assert cache.get('a') is None
+
+
+def test_fixed_response_phrasings_share_one_response_cache_entry(monkeypatch):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', 'tiered')
+    before = app.response_cache.stats()
+    first = app.respond_to_question("What are your opening hours?")
+    second = app.respond_to_question("hours please")
+    after = app.response_cache.stats()
+    assert first == second
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] == 1
+    assert after['size'] == 1
+
+
+def test_lookup_answers_are_keyed_on_the_question_text():
+    hours = app.match_intent("what are your opening hours?")
+    product = app.match_intent("price of the laptop")
+    assert app.normalize_question("price of the laptop", product) == ('text', "price of the laptop")
+    assert (app.normalize_question("price of the laptop", product)
+            != app.normalize_question("price of the laptops", product))
+    assert app.normalize_question("what are your opening hours?", hours) == ('intent', 'hours')
+
+
+def test_ner_first_keys_fixed_responses_on_the_text(monkeypatch):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', 'ner_first')
+    hours = app.match_intent("opening hours")
+    assert app.normalize_question("opening hours", hours) == ('text', "opening hours")
+
+
+def test_cached_lookups_accept_keyword_arguments():
+    assert app.list_all_products(limit=3) == app.list_all_products.uncached(3)
+    assert app.get_best_sellers(limit=2) == app.get_best_sellers.uncached(2)
+
+
+def test_positional_keyword_and_default_arguments_share_an_entry():
+    calls = []
+
+    @app.cached_lookup
+    def lookup(name, limit=5):
+        calls.append((name, limit))
+        return f"{name}:{limit}"
+
+    assert lookup('laptop', 5) == lookup('laptop', limit=5) == lookup(name='laptop') == lookup('laptop') == "laptop:5"
+    assert lookup('laptop', 2) == "laptop:2"
+    assert calls == [('laptop', 5), ('laptop', 2)]
@@ -0,0 +1,26 @@
+import os
+import shutil
+import sqlite3
+
+import check_tables
+
+
+def test_hot_queries_use_indexes(capsys):
+    assert check_tables.audit(os.environ['CHATBOT_DB_PATH']) == []
+    assert "FAIL" not in capsys.readouterr().out
+
+
+def test_a_missing_index_is_reported(tmp_path, capsys):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX idx_product_sales_units")
+    conn.close()
+    assert check_tables.audit(path) == ['best_sellers']
+    assert "FAIL: full scan on hot path" in capsys.readouterr().out
+
+
+def test_full_text_lookups_are_not_counted_as_scans():
+    plan = ['SCAN products_fts VIRTUAL TABLE INDEX 0:M1', 'SEARCH p USING INTEGER PRIMARY KEY (rowid=?)',
+            'SCAN orders', 'BLOCK: AUTOMATIC COVERING INDEX']
+    assert check_tables.find_scans(plan) == ['SCAN orders', 'BLOCK: AUTOMATIC COVERING INDEX']
@@ -0,0 +1,43 @@
+import pytest
+
+import app
+import evaluate_intents
+
+# The classifier lemmatizes with NLTK; these tests need its data (see the README's installation steps)
+NLTK_MISSING = app.check_nltk_resources(download=False)
+needs_nltk = pytest.mark.skipif(bool(NLTK_MISSING), reason=f"NLTK data not installed: {NLTK_MISSING}")
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return app.IntentClassifier(app.INTENTS)
+
+
+@needs_nltk
+def test_questions_without_keywords_are_classified(classifier):
+    names = [intent['name'] for intent in classifier.classify_many(["when are you open", "where is the store"])]
+    assert names == ['hours', 'location']
+
+
+@needs_nltk
+def test_unsure_questions_fall_back_to_the_keyword_rules(classifier):
+    fallbacks = classifier.counts['fallback']
+    assert classifier.classify_many(["zzz qqq"]) == [None]
+    assert classifier.counts['fallback'] == fallbacks + 1
+
+
+@needs_nltk
+def test_labeled_questions_are_mostly_recognized(classifier):
+    test_set = evaluate_intents.load_test_set()
+    predicted = classifier.classify_many([entry['question'].lower() for entry in test_set])
+    share, _ = evaluate_intents.accuracy(predicted, test_set)
+    assert share >= 0.8
+
+
+def test_classifier_mode_falls_back_to_rules_without_nltk_data(monkeypatch):
+    monkeypatch.setattr(app, 'INTENT_MODE', 'classifier')
+    def data_missing(text):
+        raise LookupError("wordnet")
+
+    monkeypatch.setattr(app, 'process_text', data_missing)
+    assert app.build_intent_classifier(app.INTENTS) is None
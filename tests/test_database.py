@@ -0,0 +1,32 @@
+import os
+import shutil
+import sqlite3
+
+import app
+import database
+
+
+def journal_mode(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_connection_manager_does_not_change_journal_mode(tmp_path):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    manager = app.ConnectionManager(path)
+    try:
+        assert manager.get_connection().execute("SELECT COUNT(*) FROM products").fetchone()[0] > 0
+    finally:
+        manager.close_all()
+    assert journal_mode(path) == 'delete'
+
+
+def test_migrate_switches_to_wal(tmp_path):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    database.migrate(path)
+    assert journal_mode(path) == 'wal'
@@ -0,0 +1,43 @@
+import random
+
+import app
+
+
+# The rule the matcher replaces: the first intent by priority with a keyword in the question,
+# where the question is read as if it began with a space
+def match_by_scanning(intents, text):
+    for intent in sorted(intents, key=lambda intent: intent['priority']):
+        if any(keyword in ' ' + text for keyword in intent['keywords']):
+            return intent
+    return None
+
+
+def test_matcher_agrees_with_keyword_scan():
+    words = [keyword.strip() for intent in app.INTENTS for keyword in intent['keywords']]
+    words += ['the', 'laptop', 'operating', 'underrated', 'john doe', 'hello', 'spending']
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 5)))
+        expected = match_by_scanning(app.INTENTS, text)
+        assert app.intent_matcher.match(text) is expected, text
+
+
+def test_leading_space_keywords_match_only_at_word_start():
+    assert app.intent_matcher.match("rating for the laptop")['name'] == 'product_rating'
+    assert app.intent_matcher.match("how is the laptop rated")['name'] == 'product_rating'
+    assert app.intent_matcher.match("is the store operating today") is None
+    assert app.intent_matcher.match("an underrated laptop") is None
+
+
+def test_lowest_priority_number_wins():
+    assert app.intent_matcher.match("what is the price of the product on your orders")['name'] == 'product_details'
+    assert app.intent_matcher.match("the address and opening hours")['name'] == 'hours'
+
+
+def test_custom_intents_are_matched():
+    intents = [{'name': 'b', 'priority': 2, 'keywords': ['ab', 'c']},
+               {'name': 'a', 'priority': 1, 'keywords': ['bc']}]
+    matcher = app.IntentMatcher(intents)
+    assert matcher.match('abc')['name'] == 'a'
+    assert matcher.match('xab')['name'] == 'b'
+    assert matcher.match('xyz') is None
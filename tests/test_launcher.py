@@ -0,0 +1,61 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+import launcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="the launcher forks its workers")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def ask(port, question):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}/api/answer', json.dumps({'question': question}).encode(),
+                                     {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.load(response)['answer']
+
+
+def test_workers_answer_and_write_their_own_logs(tmp_path):
+    port = free_port()
+    env = dict(os.environ, CHATBOT_LOG_FILE=str(tmp_path / 'chatbot-{pid}.log'))
+    process = subprocess.Popen([sys.executable, 'launcher.py', '--port', str(port), '--workers', '2',
+                                '--report-interval', '0'], cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                answer = ask(port, "What are your opening hours?")
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise
+                time.sleep(0.2)
+        assert 'Monday to Friday' in answer
+        for _ in range(10):
+            assert 'Monday to Friday' in ask(port, "What are your opening hours?")
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    # The launcher and each worker that handled a request write their own file
+    assert len(list(tmp_path.glob('chatbot-*.log'))) >= 2
+
+
+def test_memory_usage_of_this_process():
+    usage = launcher.memory_usage(os.getpid())
+    if usage is None:
+        pytest.skip("/proc/<pid>/smaps_rollup is not available")
+    assert usage['rss'] > 0 and usage['private'] + usage['shared'] <= usage['rss'] + 4
@@ -0,0 +1,48 @@
+import json
+import logging
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def json_log(tmp_path, monkeypatch):
+    path = tmp_path / 'chatbot.json.log'
+    monkeypatch.setattr(app, 'LOG_FORMAT', 'json')
+    monkeypatch.setattr(app, 'LOG_FILE', str(path))
+    app.configure_logging()
+    yield path
+    monkeypatch.undo()
+    app.configure_logging()
+
+
+def read_entries(path):
+    app.stop_logging()
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_json_lines_include_the_traceback(json_log):
+    try:
+        raise RuntimeError("lookup failed")
+    except RuntimeError:
+        logging.exception("Error processing question")
+    [entry] = read_entries(json_log)
+    assert entry['msg'] == "Error processing question"
+    assert 'RuntimeError: lookup failed' in entry['exc']
+
+
+def test_json_lines_carry_the_request_context(json_log):
+    with app.request_context('req-7'):
+        app.record_intent('hours')
+        logging.info("Answering %s", "hours")
+    entries = read_entries(json_log)
+    assert entries[0]['msg'] == "Answering hours"
+    assert entries[0]['request_id'] == 'req-7'
+    assert entries[1]['intent'] == 'hours'
+
+
+def test_reconfiguring_keeps_one_queue_handler(json_log):
+    app.stop_logging()
+    app.configure_logging()
+    assert sum(isinstance(handler, app.RecordQueueHandler) for handler in logging.getLogger().handlers) == 1
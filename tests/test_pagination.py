@@ -0,0 +1,23 @@
+import pytest
+
+import app
+
+
+def test_pages_need_a_positive_limit():
+    for limit in (0, -1):
+        with pytest.raises(ValueError):
+            app.get_products_page(0, limit)
+        with pytest.raises(ValueError):
+            app.get_orders_page('john doe', 0, limit)
+
+
+def test_pages_follow_on_from_the_last_id():
+    first, after = app.get_products_page(0, 5)
+    rest, end = app.get_products_page(after, 100)
+    assert len(first) == 5 and end is None
+    assert [row[0] for row in first + rest] == [row[0] for row in app.iter_products(page_size=2)]
+
+
+def test_chat_lists_point_to_the_api_when_truncated():
+    assert app.list_all_products(limit=2).endswith("and more (see /api/products)")
+    assert "More orders: /api/orders?customer=john%20doe" in app.get_order_details('john doe', limit=1)
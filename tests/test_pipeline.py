@@ -0,0 +1,41 @@
+import pytest
+
+import app
+import benchmark
+
+
+@pytest.fixture
+def stats():
+    app.pipeline_stats.reset()
+    yield app.pipeline_stats
+    app.pipeline_stats.reset()
+
+
+def test_fixed_answers_skip_spacy_in_the_tiered_pipeline(monkeypatch, stats):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', 'tiered')
+    app.respond_to_question("What are your opening hours?")
+    snapshot = stats.snapshot()
+    assert snapshot['counts']['keyword'] == 1
+    assert snapshot['ner_runs'] == 0
+
+
+def test_entity_intents_still_run_spacy(monkeypatch, stats):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', 'tiered')
+    assert app.respond_to_question("Is Jane Smith an employee?").startswith("Employee Name: Jane Smith")
+    assert stats.snapshot()['counts']['entity'] == 1
+
+
+def test_ner_first_runs_spacy_for_every_question(monkeypatch, stats):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', 'ner_first')
+    app.respond_to_question("What are your opening hours?")
+    assert stats.snapshot()['ner_runs'] == 1
+
+
+@pytest.mark.parametrize('mode', ['tiered', 'ner_first'])
+def test_batches_answer_like_single_questions(monkeypatch, mode):
+    monkeypatch.setattr(app, 'PIPELINE_MODE', mode)
+    questions = [entry['question'] for entry in benchmark.load_corpus()]
+    single = [app.respond_to_question(question) for question in questions]
+    app.response_cache.clear()
+    app.catalog_cache.clear()
+    assert app.respond_to_questions(questions) == single
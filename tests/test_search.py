@@ -0,0 +1,22 @@
+import app
+
+
+def test_name_matches_rank_above_description_matches():
+    # "gaming" is in the name of Gaming Mouse but only in the description of Laptop Y
+    assert app.get_product_details('gaming').startswith("Product Name: Gaming Mouse,")
+
+
+def test_search_matches_inside_words():
+    assert app.get_product_details('watch').startswith("Product Name: Smartwatch Z,")
+    assert 'Jane Smith' in app.get_employee_details('smith')
+
+
+def test_search_operators_are_matched_literally():
+    assert app.get_product_details('mouse" OR "laptop').startswith("Sorry")
+    assert app.get_product_details('NEAR(').startswith("Sorry")
+
+
+def test_short_terms_fall_back_to_like():
+    assert not app._use_search_index('products_fts', 'y ')
+    assert app.get_product_details('y').startswith("Product Name: Laptop Y,")
+
@@ -0,0 +1,61 @@
+from sessions import ChatRecord, SessionStore, session_id_from_cookie
+
+
+def questions(store, session_id):
+    return [record.question for record in store.history(session_id)]
+
+
+def test_sessions_keep_only_the_latest_records():
+    store = SessionStore(capacity=2, spill_path=None)
+    for question in ('one', 'two', 'three'):
+        store.append('a' * 16, question, 'answer')
+    assert questions(store, 'a' * 16) == ['two', 'three']
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(max_sessions=2, spill_path=None)
+    store.append('a' * 16, 'hello', 'hi')
+    store.append('b' * 16, 'hello', 'hi')
+    store.history('a' * 16)
+    store.append('c' * 16, 'hello', 'hi')
+    assert questions(store, 'b' * 16) == []
+    assert questions(store, 'a' * 16) == ['hello']
+    assert store.stats()['evictions'] == 1
+
+
+def test_idle_sessions_are_evicted():
+    store = SessionStore(idle_timeout=60, spill_path=None)
+    store.append('a' * 16, 'hello', 'hi')
+    store._sessions['a' * 16].last_seen -= 120
+    store.append('b' * 16, 'hello', 'hi')
+    assert store.stats()['sessions'] == 1
+    assert questions(store, 'a' * 16) == []
+
+
+def test_memory_cap_evicts_sessions():
+    store = SessionStore(max_bytes=1, spill_path=None)
+    store.append('a' * 16, 'hello', 'hi')
+    assert store.stats()['sessions'] == 0
+    assert store.stats()['bytes'] == 0
+
+
+def test_evicted_sessions_are_restored_from_the_spill_file(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = SessionStore(max_sessions=1, spill_path=path)
+    store.append('a' * 16, 'what are your hours', 'nine to five', 'hours')
+    store.append('b' * 16, 'hello', 'hi')
+    [record] = store.history('a' * 16)
+    assert (record.question, record.intent) == ('what are your hours', 'hours')
+    store.close()
+
+    # A new store, as after a restart, reads the spilled sessions back
+    restarted = SessionStore(spill_path=path)
+    assert questions(restarted, 'b' * 16) == ['hello']
+    restarted.close()
+
+
+def test_malformed_cookies_get_a_new_session_id():
+    assert session_id_from_cookie('a' * 16) == ('a' * 16, False)
+    for value in (None, '', 'short', '../../etc/passwd' * 2):
+        session_id, new = session_id_from_cookie(value)
+        assert new and session_id != value
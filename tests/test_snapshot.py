@@ -0,0 +1,58 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / 'store.db')
+    shutil.copy(os.environ['CHATBOT_DB_PATH'], path)
+    # A long interval keeps the background refresher out of the way; the tests call refresh()
+    manager = app.SnapshotConnectionManager(path, refresh_interval=3600)
+    yield manager
+    manager.close_all()
+
+
+def product_price(manager):
+    return manager.get_connection().execute("SELECT price FROM products WHERE id = 1").fetchone()[0]
+
+
+def set_price(path, price):
+    writer = sqlite3.connect(path)
+    with writer:
+        writer.execute("UPDATE products SET price = ? WHERE id = 1", (price,))
+    writer.close()
+
+
+def test_reads_come_from_the_copy_until_it_is_refreshed(snapshot):
+    assert product_price(snapshot) == 999.99
+    set_price(snapshot.path, 5.0)
+    assert product_price(snapshot) == 999.99
+    assert snapshot.refresh()
+    assert product_price(snapshot) == 5.0
+    assert snapshot.snapshot_version == 2
+
+
+def test_refresh_does_nothing_when_the_file_is_unchanged(snapshot):
+    product_price(snapshot)
+    assert not snapshot.refresh()
+    assert snapshot.snapshot_version == 1
+
+
+def test_snapshot_is_read_only(snapshot):
+    with pytest.raises(sqlite3.OperationalError):
+        snapshot.get_connection().execute("DELETE FROM products")
+
+
+def test_caches_are_dropped_when_a_new_snapshot_is_swapped_in(snapshot):
+    cache = app.QueryCache(snapshot, check_interval=0)
+    product_price(snapshot)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    set_price(snapshot.path, 5.0)
+    snapshot.refresh()
+    assert cache.get('a') is None
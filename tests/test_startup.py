@@ -0,0 +1,28 @@
+import nltk
+import spacy
+
+import app
+
+
+def test_offline_check_reports_missing_nltk_data_without_downloading(monkeypatch):
+    def not_installed(path):
+        raise LookupError(path)
+
+    def no_downloads(*args, **kwargs):
+        raise AssertionError("nltk.download must not be called offline")
+
+    monkeypatch.setattr(nltk.data, 'find', not_installed)
+    monkeypatch.setattr(nltk, 'download', no_downloads)
+    assert app.check_nltk_resources(download=False) == [name for name, _ in app.NLTK_RESOURCES]
+
+
+def test_ner_pipeline_leaves_out_unused_components(tmp_path):
+    pipeline = spacy.blank('en')
+    pipeline.add_pipe('attribute_ruler')
+    pipeline.add_pipe('entity_ruler')
+    pipeline.to_disk(tmp_path / 'model')
+    assert app.load_ner_pipeline(str(tmp_path / 'model')).pipe_names == ['entity_ruler']
+
+
+def test_startup_phases_are_timed():
+    assert {'nltk_check', 'spacy_load', 'total'} <= set(app.STARTUP_TIMINGS)
@@ -0,0 +1,45 @@
+import gzip
+
+import app
+
+
+def client():
+    return app.app.test_client()
+
+
+def test_chat_page_is_revalidated_with_its_etag():
+    first = client().get('/')
+    assert first.status_code == 200 and first.headers['ETag']
+    second = client().get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+
+
+def test_chat_page_is_sent_gzipped_when_accepted():
+    plain = client().get('/')
+    compressed = client().get('/', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+
+
+def test_versioned_stylesheet_is_cached_for_good():
+    version = app.static_assets['styles.css'].version
+    response = client().get(f'/static/styles.css?v={version}')
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client().get('/static/styles.css').headers['Cache-Control'] == 'no-cache'
+    assert client().get('/static/missing.css').status_code == 404
+
+
+def test_answers_are_rendered_into_the_page():
+    response = client().post('/', data={'pregunta': 'What are your opening hours?'})
+    assert response.status_code == 200
+    assert b'Monday to Friday' in response.data
+    assert 'chatbot_session' in response.headers['Set-Cookie']
+
+
+def test_json_api_answers_one_question():
+    response = client().post('/api/answer', json={'question': 'What are your opening hours?'})
+    assert 'Monday to Friday' in response.get_json()['answer']
+    assert client().post('/api/answer', json={'question': 3}).status_code == 400